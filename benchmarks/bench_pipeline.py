@@ -0,0 +1,240 @@
+"""Offline benchmark for the fetch -> parse -> entity-state pipeline.
+
+Runs entirely against a local stand-in for map.kakao.com serving the
+recorded fixtures in ``fixtures/`` (a small stop, a mid-size stop and a
+transfer hub) and reports:
+
+* parse:       ``parse_stop_body`` + ``build_bus_dict`` per fixture
+* fetch:       ``async_fetch_stop_data`` for N stops fetched concurrently
+               over the integration's own session
+* coordinator: ``KakaoBusCoordinator`` refresh latency for N stops, for a
+               changed payload and for an unchanged one, and the refresh
+               of one hub entry holding all N stops
+* sensors:     ``native_value`` + ``extra_state_attributes`` for every
+               sensor of N stops
+
+Usage (from the repository root, with Home Assistant installed)::
+
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --stops 1,50,500 --json bench.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Any
+
+import aiohttp
+
+from hass_env import hass_instance, make_entry, make_hub_entry, percentile, use_stand_in
+from standin import FIXTURES, StandInServer, fixture_for, load_fixture
+
+from custom_components.kakaomap_bus.api import (
+    async_fetch_stop_data,
+    build_bus_dict,
+    parse_stop_body,
+)
+from custom_components.kakaomap_bus.coordinator import KakaoBusCoordinator
+from custom_components.kakaomap_bus.scheduler import (
+    KakaoBusScheduler,
+    async_create_session,
+)
+from custom_components.kakaomap_bus.sensor import KakaoBusSensor
+
+DEFAULT_STOPS = (1, 10, 50, 100, 250, 500)
+# Lines tracked per stop, matching a typical entry.
+TRACKED_LINES = 3
+
+
+def _summary(samples: list[float]) -> dict[str, float]:
+    """Summarize latency samples in milliseconds."""
+    return {
+        "n": len(samples),
+        "mean_ms": sum(samples) / len(samples) * 1000 if samples else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "max_ms": max(samples, default=0.0) * 1000,
+    }
+
+
+def _tracked_buses(stop_id: str) -> list[str]:
+    """Return the lines an entry for this stop would track."""
+    payload = load_fixture(fixture_for(stop_id))
+    return [line["name"] for line in payload["lines"][:TRACKED_LINES]]
+
+
+def bench_parse(loops: int) -> dict[str, Any]:
+    """Measure decoding and snapshot building per fixture."""
+    results: dict[str, Any] = {}
+    for name in FIXTURES:
+        payload = load_fixture(name)
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        selected = [line["name"] for line in payload["lines"][:TRACKED_LINES]]
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            parse_stop_body(body)
+        decode = (time.perf_counter() - start) / loops
+
+        start = time.perf_counter()
+        for _ in range(loops):
+            build_bus_dict(payload, selected)
+        build = (time.perf_counter() - start) / loops
+
+        results[name] = {
+            "bytes": len(body),
+            "lines": len(payload["lines"]),
+            "decode_us": decode * 1e6,
+            "build_us": build * 1e6,
+        }
+    return results
+
+
+async def bench_fetch(stop_ids: list[str]) -> dict[str, Any]:
+    """Measure fetching every stop concurrently over one session."""
+    samples: list[float] = []
+
+    async def fetch(session: aiohttp.ClientSession, stop_id: str) -> None:
+        start = time.perf_counter()
+        await async_fetch_stop_data(session, stop_id)
+        samples.append(time.perf_counter() - start)
+
+    async with async_create_session() as session:
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(session, stop_id) for stop_id in stop_ids))
+        wall = time.perf_counter() - start
+
+    return {"wall_ms": wall * 1000, **_summary(samples)}
+
+
+async def bench_coordinators(stop_ids: list[str]) -> dict[str, Any]:
+    """Measure coordinator refresh latency and sensor state computation."""
+    async with hass_instance() as hass, async_create_session() as session:
+        # Lift the request budget and disable response reuse so the
+        # benchmark measures the pipeline, not the rate limiter or the cache.
+        scheduler = KakaoBusScheduler(
+            hass,
+            session,
+            max_concurrent=len(stop_ids),
+            requests_per_minute=10**9,
+            freshness=0,
+        )
+        coordinators = [
+            KakaoBusCoordinator(hass, make_entry(stop_id, _tracked_buses(stop_id)), scheduler)
+            for stop_id in stop_ids
+        ]
+
+        async def refresh_all() -> tuple[float, list[float]]:
+            samples: list[float] = []
+
+            async def refresh(coordinator: KakaoBusCoordinator) -> None:
+                start = time.perf_counter()
+                await coordinator.async_refresh()
+                samples.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(refresh(coordinator) for coordinator in coordinators))
+            return time.perf_counter() - start, samples
+
+        changed_wall, changed = await refresh_all()
+        unchanged_wall, unchanged = await refresh_all()
+        failed = sum(not coordinator.last_update_success for coordinator in coordinators)
+
+        sensors = [
+            KakaoBusSensor(tracker, bus_name)
+            for coordinator in coordinators
+            for tracker in coordinator.stops.values()
+            for bus_name in tracker.buses
+        ]
+        start = time.perf_counter()
+        for sensor in sensors:
+            _ = sensor.native_value
+            _ = sensor.extra_state_attributes
+        sensor_time = time.perf_counter() - start
+
+        hub = KakaoBusCoordinator(hass, make_hub_entry(stop_ids), scheduler)
+        start = time.perf_counter()
+        await hub.async_refresh()
+        hub_wall = time.perf_counter() - start
+        failed += not hub.last_update_success
+
+    return {
+        "failed": failed,
+        "hub": {"wall_ms": hub_wall * 1000},
+        "changed": {"wall_ms": changed_wall * 1000, **_summary(changed)},
+        "unchanged": {"wall_ms": unchanged_wall * 1000, **_summary(unchanged)},
+        "sensors": {
+            "count": len(sensors),
+            "total_ms": sensor_time * 1000,
+            "per_sensor_us": sensor_time / len(sensors) * 1e6 if sensors else 0.0,
+        },
+    }
+
+
+def _print_report(report: dict[str, Any]) -> None:
+    """Print a human-readable report."""
+    print("parse (per call)")
+    for name, row in report["parse"].items():
+        print(
+            f"  {name:<12} {row['bytes']:>7} B {row['lines']:>3} lines  "
+            f"decode {row['decode_us']:8.1f} us  build {row['build_us']:8.1f} us"
+        )
+
+    print("\nscale            wall ms    p50 ms    p95 ms    max ms")
+    for stops, row in report["scale"].items():
+        for label, stats in (
+            ("fetch", row["fetch"]),
+            ("refresh", row["coordinator"]["changed"]),
+            ("refresh (same)", row["coordinator"]["unchanged"]),
+        ):
+            print(
+                f"  {stops:>4} {label:<14} {stats['wall_ms']:8.1f} {stats['p50_ms']:9.2f} "
+                f"{stats['p95_ms']:9.2f} {stats['max_ms']:9.2f}"
+            )
+        print(f"  {stops:>4} refresh (hub)  {row['coordinator']['hub']['wall_ms']:8.1f}")
+        sensors = row["coordinator"]["sensors"]
+        print(
+            f"  {stops:>4} sensors        {sensors['total_ms']:8.1f}   "
+            f"{sensors['count']} entities, {sensors['per_sensor_us']:.1f} us each"
+        )
+        if row["coordinator"]["failed"]:
+            print(f"  {stops:>4} WARNING: {row['coordinator']['failed']} refreshes failed")
+
+
+async def main() -> None:
+    """Run the benchmark suite."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--stops",
+        default=",".join(str(count) for count in DEFAULT_STOPS),
+        help="comma-separated stop counts to benchmark",
+    )
+    parser.add_argument("--loops", type=int, default=2000, help="iterations for parse timing")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    args = parser.parse_args()
+
+    server = StandInServer()
+    await server.start()
+    use_stand_in(server.url_template)
+
+    report: dict[str, Any] = {"parse": bench_parse(args.loops), "scale": {}}
+    try:
+        for count in (int(value) for value in args.stops.split(",")):
+            stop_ids = [f"BS{100000 + index}" for index in range(count)]
+            report["scale"][count] = {
+                "fetch": await bench_fetch(stop_ids),
+                "coordinator": await bench_coordinators(stop_ids),
+            }
+    finally:
+        await server.stop()
+
+    _print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,387 @@
+"""Offline soak test of many coordinators against a flaky KakaoMap stand-in.
+
+Runs N single-stop entries (or hubs of ``--hub-size`` stops) on the real
+scheduler, polling a local stand-in for map.kakao.com that follows a
+script of fault phases (latency, 429/503, truncated JSON, missing
+``lines``, timeouts). Every ``--report-every`` seconds it prints:
+
+* server request rate and outcomes, and client retries
+* event-loop lag (p95/max of a 100 ms sleeper)
+* resident memory and its growth since the start
+* entries whose last update succeeded, stops replaying stale data or
+  unavailable, and sensors that are available, have a value and show a
+  prediction from the arrival history
+* the state of the shared circuit breaker
+* exceptions that escaped the integration's error handling; any of these
+  fails the run with exit status 1
+
+Usage (from the repository root, with Home Assistant installed)::
+
+    python benchmarks/soak.py
+    python benchmarks/soak.py --entries 500 --scan-interval 30 \\
+        --phases clean:300,flaky:1800,outage:600,throttled:300,clean:600 --json soak.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from contextlib import suppress
+import json
+import logging
+import os
+import resource
+import time
+from typing import Any
+
+from hass_env import (
+    hass_instance,
+    make_entry,
+    make_hub_entry,
+    percentile,
+    use_request_timeout,
+    use_stand_in,
+)
+from standin import Faults, StandInServer, fixture_for, load_fixture
+
+from custom_components.kakaomap_bus.coordinator import KakaoBusCoordinator
+from custom_components.kakaomap_bus.scheduler import (
+    KakaoBusScheduler,
+    async_create_session,
+)
+from custom_components.kakaomap_bus.sensor import KakaoBusSensor
+
+# Fault mix of each phase name usable in --phases.
+PROFILES: dict[str, dict[str, float]] = {
+    "clean": {},
+    "slow": {"latency": 2.0, "timeout": 0.05},
+    "flaky": {
+        "latency": 0.3,
+        "rate_limited": 0.01,
+        "server_error": 0.05,
+        "truncated": 0.02,
+        "missing_lines": 0.02,
+        "timeout": 0.02,
+    },
+    "throttled": {"rate_limited": 0.5},
+    "garbage": {"truncated": 0.3, "missing_lines": 0.3},
+    "outage": {"server_error": 1.0},
+}
+DEFAULT_PHASES = "clean:60,flaky:240,outage:120,throttled:60,clean:120"
+# Lines tracked per stop, matching a typical entry.
+TRACKED_LINES = 3
+LAG_INTERVAL = 0.1
+
+
+def _parse_phases(text: str) -> list[tuple[str, float]]:
+    """Parse 'clean:60,flaky:300' into (profile, seconds) pairs."""
+    phases: list[tuple[str, float]] = []
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        name, _, seconds = part.partition(":")
+        if name not in PROFILES or not seconds:
+            raise SystemExit(f"Invalid phase '{part}'; profiles: {', '.join(PROFILES)}")
+        phases.append((name, float(seconds)))
+    return phases
+
+
+def _rss_bytes() -> int:
+    """Return the resident set size of this process."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS where /proc is unavailable.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class LoopLagMonitor:
+    """Measure how late a short sleep wakes up, as event-loop lag."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.samples: list[float] = []
+
+    async def run(self) -> None:
+        """Sample until cancelled."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.samples.append(max(0.0, loop.time() - start - LAG_INTERVAL))
+
+    def take(self) -> list[float]:
+        """Return and clear the samples since the last call."""
+        samples, self.samples = self.samples, []
+        return samples
+
+
+class EscapedErrors(logging.Handler):
+    """Collect logged exceptions, which the error paths under test must not let out.
+
+    Failed fetches are expected; their tracebacks are not. A traceback means
+    an exception escaped the fallback (e.g. while describing the error) and
+    was only caught by the coordinator or the event loop.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        super().__init__(logging.ERROR)
+        self.records: list[logging.LogRecord] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Keep records that carry an exception."""
+        if record.exc_info:
+            self.records.append(record)
+
+
+class SoakRun:
+    """Coordinators under test and the counters sampled from them."""
+
+    def __init__(
+        self,
+        server: StandInServer,
+        scheduler: KakaoBusScheduler,
+        coordinators: list[KakaoBusCoordinator],
+    ) -> None:
+        """Initialize."""
+        self.server = server
+        self.scheduler = scheduler
+        self.coordinators = coordinators
+        self.lag = LoopLagMonitor()
+        self.escaped = EscapedErrors()
+        self.rows: list[dict[str, Any]] = []
+        self._sensors: dict[tuple[str, str], KakaoBusSensor] = {}
+        self._requests = 0
+        self._outcomes: dict[str, int] = {}
+        self._retries = 0
+        self._started = time.monotonic()
+        self._last = self._started
+        self._rss_start = _rss_bytes()
+
+    def _sensors_now(self) -> list[KakaoBusSensor]:
+        """Return a sensor per tracked line, as the sensor platform would."""
+        sensors = []
+        for coordinator in self.coordinators:
+            for tracker in coordinator.stops.values():
+                for bus_name in tracker.buses:
+                    key = (tracker.key, bus_name)
+                    if (sensor := self._sensors.get(key)) is None:
+                        sensor = self._sensors[key] = KakaoBusSensor(tracker, bus_name)
+                    sensors.append(sensor)
+        return sensors
+
+    def sample(self, phase: int, name: str) -> dict[str, Any]:
+        """Record one report row covering the time since the previous one."""
+        now = time.monotonic()
+        elapsed = max(now - self._last, 1e-9)
+        self._last = now
+
+        outcomes = dict(self.server.outcomes)
+        delta = {
+            kind: outcomes.get(kind, 0) - self._outcomes.get(kind, 0)
+            for kind in ("ok", *Faults.KINDS)
+        }
+        self._outcomes = outcomes
+        requests = self.server.request_count - self._requests
+        self._requests = self.server.request_count
+
+        trackers = [
+            tracker for coordinator in self.coordinators for tracker in coordinator.stops.values()
+        ]
+        retries = sum(tracker.metrics.retries for tracker in trackers)
+        new_retries, self._retries = retries - self._retries, retries
+
+        sensors = self._sensors_now()
+        available = [sensor for sensor in sensors if sensor.available]
+        # (minutes, predicted) per available sensor.
+        arrivals = [sensor._arrival() for sensor in available]
+        lag = self.lag.take()
+        rss = _rss_bytes()
+        row = {
+            "t": round(now - self._started, 1),
+            "phase": phase,
+            "profile": name,
+            "requests_per_s": requests / elapsed,
+            "outcomes": delta,
+            "retries": new_retries,
+            "loop_lag_p95_ms": percentile(lag, 95) * 1000,
+            "loop_lag_max_ms": max(lag, default=0.0) * 1000,
+            "rss_mb": rss / 2**20,
+            "rss_growth_mb": (rss - self._rss_start) / 2**20,
+            "entries_ok": sum(c.last_update_success for c in self.coordinators),
+            "entries": len(self.coordinators),
+            "stops_stale": sum(tracker.stale for tracker in trackers),
+            "stops_unavailable": sum(not tracker.available for tracker in trackers),
+            "stops": len(trackers),
+            "sensors_available": len(available),
+            "sensors_with_value": sum(minutes is not None for minutes, _ in arrivals),
+            "sensors_predicted": sum(predicted for _, predicted in arrivals),
+            "sensors": len(sensors),
+            "breaker": self.scheduler.breaker.state,
+            "escaped_errors": len(self.escaped.records),
+        }
+        self.rows.append(row)
+        return row
+
+
+def _print_header() -> None:
+    """Print the column header of the report."""
+    print(
+        "     t phase      req/s   ok  429  5xx trunc miss  t/o retry  "
+        "lag p95/max ms  rss MB (+)   entries ok  stale unavail  sensors avail/value/pred  "
+        "breaker    escaped"
+    )
+
+
+def _print_row(row: dict[str, Any]) -> None:
+    """Print one report row."""
+    out = row["outcomes"]
+    print(
+        f"{row['t']:6.0f} {row['profile']:<9} {row['requests_per_s']:6.1f} "
+        f"{out['ok']:4} {out['rate_limited']:4} {out['server_error']:4} "
+        f"{out['truncated']:5} {out['missing_lines']:4} {out['timeout']:4} {row['retries']:5}  "
+        f"{row['loop_lag_p95_ms']:6.1f}/{row['loop_lag_max_ms']:6.1f}  "
+        f"{row['rss_mb']:6.1f} ({row['rss_growth_mb']:+5.1f})  "
+        f"{row['entries_ok']:>5}/{row['entries']:<5} {row['stops_stale']:5} {row['stops_unavailable']:7}  "
+        f"{row['sensors']:>7} {row['sensors_available']:>5}/{row['sensors_with_value']}"
+        f"/{row['sensors_predicted']:<5}  "
+        f"{row['breaker']:<10} {row['escaped_errors']}"
+    )
+
+
+def _summary(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Summarize the rows of each phase."""
+    result: list[dict[str, Any]] = []
+    for phase in dict.fromkeys(row["phase"] for row in rows):
+        phase_rows = [row for row in rows if row["phase"] == phase]
+        result.append({
+            "profile": phase_rows[0]["profile"],
+            "requests_per_s": sum(r["requests_per_s"] for r in phase_rows) / len(phase_rows),
+            "loop_lag_max_ms": max(r["loop_lag_max_ms"] for r in phase_rows),
+            "min_entries_ok": min(r["entries_ok"] for r in phase_rows),
+            "min_sensors_available": min(r["sensors_available"] for r in phase_rows),
+            "rss_growth_mb": phase_rows[-1]["rss_growth_mb"],
+        })
+    return result
+
+
+async def soak(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the phases and return the report."""
+    phases = _parse_phases(args.phases)
+    server = StandInServer(vary=True, seed=args.seed)
+    await server.start()
+    use_stand_in(server.url_template)
+    use_request_timeout(args.request_timeout)
+
+    stop_ids = [f"BS{100000 + index}" for index in range(args.entries)]
+    if args.hub_size:
+        entries = [
+            make_hub_entry(stop_ids[index : index + args.hub_size], args.scan_interval)
+            for index in range(0, len(stop_ids), args.hub_size)
+        ]
+    else:
+        entries = [
+            make_entry(
+                stop_id,
+                [
+                    line["name"]
+                    for line in load_fixture(fixture_for(stop_id))["lines"][:TRACKED_LINES]
+                ],
+                args.scan_interval,
+            )
+            for stop_id in stop_ids
+        ]
+
+    try:
+        async with hass_instance() as hass, async_create_session() as session:
+            scheduler = KakaoBusScheduler(
+                hass,
+                session,
+                max_concurrent=args.max_concurrent,
+                requests_per_minute=args.requests_per_minute,
+            )
+            coordinators = [KakaoBusCoordinator(hass, entry, scheduler) for entry in entries]
+            run = SoakRun(server, scheduler, coordinators)
+            logging.getLogger().addHandler(run.escaped)
+            lag_task = asyncio.create_task(run.lag.run())
+            for coordinator in coordinators:
+                coordinator.async_start()
+
+            _print_header()
+            try:
+                for phase, (name, seconds) in enumerate(phases):
+                    server.faults = Faults(
+                        hang=args.request_timeout + 1, **PROFILES[name]
+                    )
+                    phase_end = time.monotonic() + seconds
+                    while (remaining := phase_end - time.monotonic()) > 0:
+                        await asyncio.sleep(min(args.report_every, remaining))
+                        _print_row(run.sample(phase, name))
+            finally:
+                lag_task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await lag_task
+                for coordinator in coordinators:
+                    coordinator.async_stop()
+                logging.getLogger().removeHandler(run.escaped)
+    finally:
+        await server.stop()
+
+    return {
+        "entries": len(entries),
+        "stops": len(stop_ids),
+        "scan_interval": args.scan_interval,
+        "phases": phases,
+        "summary": _summary(run.rows),
+        "rows": run.rows,
+        "escaped_errors": [
+            run.escaped.format(record) for record in run.escaped.records
+        ],
+    }
+
+
+async def main() -> None:
+    """Run the soak test."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=200, help="stops to poll")
+    parser.add_argument(
+        "--hub-size", type=int, default=0, help="group stops into hubs of this size (0: none)"
+    )
+    parser.add_argument(
+        "--scan-interval", type=int, default=30, help="poll interval of every entry (s)"
+    )
+    parser.add_argument(
+        "--phases",
+        default=DEFAULT_PHASES,
+        help=f"comma-separated profile:seconds; profiles: {', '.join(PROFILES)}",
+    )
+    parser.add_argument("--report-every", type=float, default=10, help="seconds per row")
+    parser.add_argument(
+        "--request-timeout", type=float, default=5, help="per-request timeout (s)"
+    )
+    # The request budget is lifted by default so upstream faults, not the
+    # limiter, dominate; pass 4 and 60 to soak the integration defaults.
+    parser.add_argument("--max-concurrent", type=int, default=32)
+    parser.add_argument("--requests-per-minute", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=1, help="fault random seed")
+    parser.add_argument("--json", help="also write the raw results to this file")
+    args = parser.parse_args()
+
+    report = await soak(args)
+    print("\nphase      req/s  max lag ms  min entries ok  min sensors avail  rss growth MB")
+    for row in report["summary"]:
+        print(
+            f"{row['profile']:<9} {row['requests_per_s']:6.1f} {row['loop_lag_max_ms']:11.1f} "
+            f"{row['min_entries_ok']:15} {row['min_sensors_available']:18} "
+            f"{row['rss_growth_mb']:+14.1f}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if escaped := report["escaped_errors"]:
+        print(f"\n{len(escaped)} exceptions escaped the error handling; the first was:")
+        print(escaped[0])
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
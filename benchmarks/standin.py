@@ -0,0 +1,172 @@
+"""Local stand-in for the KakaoMap bus stop endpoint.
+
+Serves the JSON fixtures in ``fixtures/`` on ``/bus/stop.json`` so the
+integration can be exercised without network access. Stop IDs are mapped
+onto fixtures deterministically; ``vary=True`` shifts arrival times on
+every request so payloads change the way the live API does, and
+``faults`` injects latency and upstream failures for soak testing.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import copy
+import json
+from pathlib import Path
+import random
+import zlib
+
+from aiohttp import web
+
+FIXTURE_DIR = Path(__file__).parent / "fixtures"
+FIXTURES = ("stop_small", "stop_medium", "stop_hub")
+
+
+def load_fixture(name: str) -> dict:
+    """Load one recorded stop payload."""
+    with (FIXTURE_DIR / f"{name}.json").open(encoding="utf-8") as file:
+        return json.load(file)
+
+
+def fixture_for(stop_id: str, fixtures: tuple[str, ...] = FIXTURES) -> str:
+    """Map a stop ID onto a fixture name deterministically."""
+    return fixtures[zlib.crc32(stop_id.encode()) % len(fixtures)]
+
+
+class Faults:
+    """Per-request fault rates of the stand-in server.
+
+    Every request waits up to ``latency`` seconds, then draws at most one
+    fault: a 429 with ``Retry-After``, a 503, a body cut in half, a payload
+    without ``lines``, or no answer for ``hang`` seconds, which should
+    outlast the client timeout.
+    """
+
+    KINDS = ("rate_limited", "server_error", "truncated", "missing_lines", "timeout")
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limited: float = 0.0,
+        server_error: float = 0.0,
+        truncated: float = 0.0,
+        missing_lines: float = 0.0,
+        timeout: float = 0.0,
+        retry_after: int = 30,
+        hang: float = 11.0,
+    ) -> None:
+        """Initialize; rates are probabilities per request."""
+        self.latency = latency
+        self.rates = {
+            "rate_limited": rate_limited,
+            "server_error": server_error,
+            "truncated": truncated,
+            "missing_lines": missing_lines,
+            "timeout": timeout,
+        }
+        self.retry_after = retry_after
+        self.hang = hang
+
+    def draw(self, rng: random.Random) -> str | None:
+        """Return the fault for one request, or None to answer normally."""
+        roll = rng.random()
+        for kind in self.KINDS:
+            roll -= self.rates[kind]
+            if roll < 0:
+                return kind
+        return None
+
+
+class StandInServer:
+    """Serve recorded KakaoMap payloads from a local aiohttp server."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        fixtures: tuple[str, ...] = FIXTURES,
+        vary: bool = False,
+        faults: Faults | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize; ``faults`` may be swapped while the server runs."""
+        self.host = host
+        self.port = port
+        self.fixtures = fixtures
+        self.vary = vary
+        self.faults = faults or Faults()
+        self.request_count = 0
+        self.bytes_sent = 0
+        # Requests per outcome: "ok" or one of Faults.KINDS.
+        self.outcomes: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._payloads = {name: load_fixture(name) for name in fixtures}
+        self._bodies = {
+            name: json.dumps(payload, ensure_ascii=False).encode()
+            for name, payload in self._payloads.items()
+        }
+        self._runner: web.AppRunner | None = None
+
+    @property
+    def url_template(self) -> str:
+        """Return a template usable in place of ``api.API_URL``."""
+        return f"http://{self.host}:{self.port}/bus/stop.json?busstopid={{}}"
+
+    def body_for(self, stop_id: str) -> bytes:
+        """Return the response body for one stop."""
+        name = fixture_for(stop_id, self.fixtures)
+        if not self.vary:
+            return self._bodies[name]
+
+        payload = copy.deepcopy(self._payloads[name])
+        payload["id"] = stop_id
+        shift = (self.request_count * 7) % 60
+        for line in payload["lines"]:
+            arrival = line["arrival"]
+            for key in ("arrivalTime", "arrivalTime2"):
+                if arrival.get(key):
+                    arrival[key] = max(1, arrival[key] - shift)
+        return json.dumps(payload, ensure_ascii=False).encode()
+
+    async def handle_stop(self, request: web.Request) -> web.StreamResponse:
+        """Handle one stop request."""
+        self.request_count += 1
+        stop_id = request.query.get("busstopid", "")
+        faults = self.faults
+        if faults.latency:
+            await asyncio.sleep(self._random.uniform(0, faults.latency))
+        fault = faults.draw(self._random)
+        self.outcomes[fault or "ok"] += 1
+
+        if fault == "rate_limited":
+            return web.Response(status=429, headers={"Retry-After": str(faults.retry_after)})
+        if fault == "server_error":
+            return web.Response(status=503)
+        if fault == "timeout":
+            await asyncio.sleep(faults.hang)
+        if fault == "missing_lines":
+            body = json.dumps({"id": stop_id, "name": stop_id}).encode()
+        else:
+            body = self.body_for(stop_id)
+            if fault == "truncated":
+                body = body[: len(body) // 2]
+        self.bytes_sent += len(body)
+        return web.Response(body=body, content_type="application/json", charset="utf-8")
+
+    async def start(self) -> None:
+        """Start listening; an ephemeral port is picked when port is 0."""
+        app = web.Application()
+        app.router.add_get("/bus/stop.json", self.handle_stop)
+        # Do not wait for hanging requests when stopping.
+        self._runner = web.AppRunner(app, access_log=None, shutdown_timeout=0)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        if self.port == 0:
+            self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
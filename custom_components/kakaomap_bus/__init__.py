@@ -6,22 +6,42 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DOMAIN
-from .coordinator import KakaoBusCoordinator
+from .const import DATA_SCHEDULER, DOMAIN
+from .coordinator import (
+    KakaoBusCoordinator,
+    entry_stops,
+    history_store,
+    snapshot_store,
+    tracker_key,
+)
+from .profiler import async_get_profiler
+from .scheduler import async_get_scheduler
+from .services import async_setup_services
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the integration services."""
+    async_setup_services(hass)
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up HA KakaoMap Bus from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
+    scheduler = async_get_scheduler(hass)
     
-    coordinator = KakaoBusCoordinator(hass, entry)
-    await coordinator.async_config_entry_first_refresh()
+    coordinator = KakaoBusCoordinator(hass, entry, scheduler)
+    # Start from the last saved snapshot and fetch in the background so
+    # startup time does not depend on KakaoMap or the number of stops.
+    await coordinator.async_restore()
     
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    coordinator.async_start()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
@@ -33,10 +53,28 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator: KakaoBusCoordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_unload()
+        if not any(
+            isinstance(value, KakaoBusCoordinator) for value in hass.data[DOMAIN].values()
+        ):
+            # Nothing is left to profile; write what was collected so far.
+            if (profiler := async_get_profiler(hass)) is not None:
+                profiler.async_finish()
+            await hass.data[DOMAIN].pop(DATA_SCHEDULER).async_close()
         
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the saved snapshots and histories when an entry is deleted."""
+    for stop_id in entry_stops(entry):
+        key = tracker_key(entry, stop_id)
+        await snapshot_store(hass, key).async_remove()
+        await history_store(hass, key).async_remove()
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    # Options only affect polling, the tracked lines and a hub's stops,
+    # which the running coordinator and sensor platform pick up in place.
+    coordinator: KakaoBusCoordinator = hass.data[DOMAIN][entry.entry_id]
+    await coordinator.async_apply_options()
@@ -2,16 +2,46 @@
 from __future__ import annotations
 
 import asyncio
+from email.utils import parsedate_to_datetime
+import hashlib
 import json
+import logging
+import random
+import time
+from collections.abc import Collection
+from datetime import datetime, timezone
 from typing import Any
 
 import aiohttp
 
-from .const import DEFAULT_REQUEST_RETRIES
+try:
+    from aiohttp.compression_utils import HAS_BROTLI
+except ImportError:  # aiohttp < 3.9
+    HAS_BROTLI = False
+
+try:
+    # Ships with Home Assistant; decodes bytes without building a str first.
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
+from .breaker import CircuitBreaker, CircuitOpenError
+from .const import DEFAULT_REQUEST_RETRIES, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX
+from .metrics import RequestLog, StopMetrics
+from .models import BusArrival
+
+_LOGGER = logging.getLogger(__name__)
 
 API_URL = "https://map.kakao.com/bus/stop.json?busstopid={}"
-REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+REQUEST_HEADERS = {
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+    # Only offer brotli when aiohttp can decode it.
+    "Accept-Encoding": "gzip, deflate, br" if HAS_BROTLI else "gzip, deflate",
+}
 REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+# aiohttp < 3.10 has no separate DNS error; isinstance(err, ()) is False.
+_DNS_ERROR = getattr(aiohttp, "ClientConnectorDNSError", ())
 
 
 def is_transient_api_error(err: Exception) -> bool:
@@ -19,6 +49,7 @@ def is_transient_api_error(err: Exception) -> bool:
     if isinstance(
         err,
         (
+            CircuitOpenError,
             aiohttp.ClientConnectorError,
             aiohttp.ServerDisconnectedError,
             aiohttp.ClientOSError,
@@ -33,14 +64,51 @@ def is_transient_api_error(err: Exception) -> bool:
     )
 
 
-async def async_fetch_stop_data(
-    session: aiohttp.ClientSession, stop_id: str, retries: int = DEFAULT_REQUEST_RETRIES
-) -> dict[str, Any]:
-    """Fetch and parse stop data from KakaoMap with short retry handling."""
+def retry_after_seconds(err: Exception) -> float | None:
+    """Return the Retry-After delay of a 429/503 response, if the server sent one."""
+    if not isinstance(err, aiohttp.ClientResponseError) or err.status not in (429, 503):
+        return None
+    value = (err.headers or {}).get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_backoff(attempt: int) -> float:
+    """Return the jittered exponential delay before retry ``attempt + 1``."""
+    delay = min(RETRY_BACKOFF_MAX, RETRY_BACKOFF_BASE * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def async_fetch_stop_body(
+    session: aiohttp.ClientSession,
+    stop_id: str,
+    retries: int = DEFAULT_REQUEST_RETRIES,
+    metrics: StopMetrics | RequestLog | None = None,
+    breaker: CircuitBreaker | None = None,
+) -> bytes:
+    """Fetch the raw stop payload from KakaoMap with short retry handling.
+
+    When a ``breaker`` is given, no request is sent while it is open and
+    every outcome is reported to it. A Retry-After from the server is
+    handed to the breaker instead of being retried inline.
+    """
     url = API_URL.format(stop_id)
     last_err: Exception | None = None
 
     for attempt in range(1, max(1, retries) + 1):
+        claimed_probe = breaker is not None and breaker.before_request()
+        started = time.perf_counter()
         try:
             async with session.get(
                 url,
@@ -48,28 +116,134 @@ async def async_fetch_stop_data(
                 timeout=REQUEST_TIMEOUT,
             ) as response:
                 response.raise_for_status()
-                return json.loads(await response.text())
+                body = await response.read()
         except Exception as err:
+            if metrics is not None:
+                metrics.record_request(time.perf_counter() - started, None)
+            transient = is_transient_api_error(err)
+            retry_after = retry_after_seconds(err)
+            if breaker is not None:
+                breaker.record_failure(transient, retry_after)
             last_err = err
-            if attempt >= retries or not is_transient_api_error(err):
+            if attempt >= retries or not transient or retry_after is not None:
                 raise
 
-            await asyncio.sleep(min(attempt, 3))
+            if metrics is not None:
+                metrics.record_retry()
+            await asyncio.sleep(retry_backoff(attempt))
+        except BaseException:
+            if claimed_probe:
+                breaker.release_probe()
+            raise
+        else:
+            if metrics is not None:
+                metrics.record_request(time.perf_counter() - started, len(body))
+            if breaker is not None:
+                breaker.record_success()
+            return body
 
     raise RuntimeError(f"Request failed without an exception for stop {stop_id}") from last_err
 
 
-def build_bus_dict(data: dict[str, Any]) -> dict[str, dict[str, Any]]:
-    """Convert the KakaoMap payload into a dict keyed by bus name."""
+def parse_stop_body(body: bytes) -> dict[str, Any]:
+    """Decode a raw stop payload straight from the response bytes.
+
+    Only the top level is checked here; ``build_bus_dict`` validates the
+    lines while it converts them.
+    """
+    data = json_loads(body)
+    if not isinstance(data, dict):
+        raise ValueError(
+            f"Unexpected API response: expected an object, got {type(data).__name__}"
+        )
+    return data
+
+
+def payload_digest(body: bytes) -> bytes:
+    """Return a short digest used to detect unchanged payloads."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+class StopPayload:
+    """One raw stop response, shared by every caller that asked for it."""
+
+    __slots__ = ("stop_id", "body", "digest", "fetched_at", "received", "_data")
+
+    def __init__(self, stop_id: str, body: bytes, fetched_at: datetime, received: float) -> None:
+        """Initialize; ``received`` is a monotonic timestamp."""
+        self.stop_id = stop_id
+        self.body = body
+        self.digest = payload_digest(body)
+        self.fetched_at = fetched_at
+        self.received = received
+        self._data: dict[str, Any] | None = None
+
+    def decode(self) -> dict[str, Any]:
+        """Return the decoded payload, decoding it only once."""
+        if self._data is None:
+            self._data = parse_stop_body(self.body)
+        return self._data
+
+
+async def async_fetch_stop_data(
+    session: aiohttp.ClientSession, stop_id: str, retries: int = DEFAULT_REQUEST_RETRIES
+) -> dict[str, Any]:
+    """Fetch and parse stop data from KakaoMap with short retry handling."""
+    return parse_stop_body(await async_fetch_stop_body(session, stop_id, retries))
+
+
+# Exact JSON types accepted per field; bool is not an int here.
+_INT = frozenset({int})
+_NUMBER = frozenset({int, float})
+_STR = frozenset({str})
+_STR_OR_INT = frozenset({str, int})
+_OBJECT = frozenset({dict})
+
+
+def _typed(value: Any, kinds: frozenset[type], field: str, name: str) -> Any:
+    """Return ``value`` if it is None or of one of ``kinds``, else raise ValueError."""
+    if value is None or type(value) in kinds:
+        return value
+    raise ValueError(f"Invalid '{field}' for line {name} in API response: {value!r}")
+
+
+def build_bus_dict(
+    data: dict[str, Any], buses: Collection[str] | None = None
+) -> dict[str, BusArrival]:
+    """Convert the KakaoMap payload into arrivals keyed by bus name.
+
+    When ``buses`` is given, lines that are not selected are dropped in the
+    same pass. Entries without a usable name cannot be a selected line and
+    are skipped; a selected line with fields of the wrong type fails the
+    whole payload.
+    """
     lines = data.get("lines")
     if not isinstance(lines, list):
         raise ValueError("Missing 'lines' key in API response")
 
-    bus_dict: dict[str, dict[str, Any]] = {}
+    bus_dict: dict[str, BusArrival] = {}
     for line in lines:
-        name = line.get("name")
-        if name:
-            bus_dict[name] = line
+        name = line.get("name") if isinstance(line, dict) else None
+        if type(name) is not str:
+            if name is not None or not isinstance(line, dict):
+                _LOGGER.debug("Skipping malformed line in API response: %r", line)
+            continue
+        if not name or (buses is not None and name not in buses):
+            continue
+        # Only the selected lines are validated; the rest are never read.
+
+        arrival = _typed(line.get("arrival"), _OBJECT, "arrival", name) or {}
+        get = arrival.get
+        bus_dict[name] = BusArrival(
+            name,
+            arrival_time=int(_typed(get("arrivalTime"), _NUMBER, "arrivalTime", name) or 0),
+            arrival_time_2=int(_typed(get("arrivalTime2"), _NUMBER, "arrivalTime2", name) or 0),
+            stop_count=_typed(get("busStopCount"), _INT, "busStopCount", name),
+            stop_count_2=_typed(get("busStopCount2"), _INT, "busStopCount2", name),
+            direction=_typed(get("direction"), _STR, "direction", name),
+            vehicle_type=_typed(get("vehicleType"), _STR_OR_INT, "vehicleType", name),
+            realtime_state=_typed(line.get("realtimeState"), _STR, "realtimeState", name) or "",
+        )
 
     return bus_dict
 
@@ -80,10 +254,9 @@ def build_bus_labels(data: dict[str, Any]) -> dict[str, str]:
     labels: dict[str, str] = {}
 
     for name, line in bus_dict.items():
-        direction = line.get("arrival", {}).get("direction", "")
         label = name
-        if direction:
-            label += f" ({direction})"
+        if line.direction:
+            label += f" ({line.direction})"
         labels[name] = label
 
     return labels
@@ -91,13 +264,23 @@ def build_bus_labels(data: dict[str, Any]) -> dict[str, str]:
 
 def describe_api_error(err: Exception) -> str:
     """Return a user-actionable description for network and parsing failures."""
-    if isinstance(err, aiohttp.ClientConnectorDNSError):
+    if isinstance(err, _DNS_ERROR):
         return (
             "DNS lookup failed while contacting KakaoMap; "
             "check Home Assistant DNS and network settings"
         )
     if isinstance(err, asyncio.TimeoutError):
         return "Timed out while contacting KakaoMap"
+    if isinstance(err, CircuitOpenError):
+        if err.probing:
+            return (
+                "KakaoMap requests paused while waiting for a probe request "
+                "after repeated failures or rate limiting"
+            )
+        return (
+            f"KakaoMap requests paused for {err.retry_in:.0f}s "
+            "after repeated failures or rate limiting"
+        )
     if isinstance(err, aiohttp.ClientError):
         return f"Error communicating with API: {err}"
     if isinstance(err, json.JSONDecodeError):
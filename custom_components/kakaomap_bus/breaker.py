@@ -0,0 +1,129 @@
+"""Host-wide circuit breaker for KakaoMap requests."""
+from __future__ import annotations
+
+import logging
+import random
+import time
+
+from .const import (
+    BREAKER_BASE_DELAY,
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_MAX_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the breaker is open."""
+
+    def __init__(self, retry_in: float, probing: bool = False) -> None:
+        """Initialize; ``probing`` means a half-open probe request is in flight."""
+        super().__init__(
+            "KakaoMap requests paused while waiting for a probe request"
+            if probing
+            else f"KakaoMap requests paused for {retry_in:.0f}s"
+        )
+        self.retry_in = retry_in
+        self.probing = probing
+
+
+class CircuitBreaker:
+    """Stop every stop from hammering KakaoMap while it is failing.
+
+    Consecutive transient failures across all stops open the breaker for
+    an exponentially growing, jittered period; a ``Retry-After`` from the
+    server opens it for exactly that long. Once the period ends a single
+    probe request is let through: success closes the breaker, another
+    transient failure re-opens it with a longer delay.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        base_delay: float = BREAKER_BASE_DELAY,
+        max_delay: float = BREAKER_MAX_DELAY,
+    ) -> None:
+        """Initialize."""
+        self._failure_threshold = max(1, failure_threshold)
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._failures = 0
+        self._level = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Return 'closed', 'open' or 'half_open'."""
+        if self._open_until == 0.0:
+            return "closed"
+        if time.monotonic() < self._open_until:
+            return "open"
+        return "half_open"
+
+    @property
+    def retry_in(self) -> float:
+        """Return seconds until the next request may be attempted."""
+        return max(0.0, self._open_until - time.monotonic())
+
+    def raise_if_open(self) -> None:
+        """Raise CircuitOpenError while requests are blocked, without side effects."""
+        state = self.state
+        if state == "open":
+            raise CircuitOpenError(self.retry_in)
+        if state == "half_open" and self._probing:
+            # The pause is over; the outcome of the probe decides what comes next.
+            raise CircuitOpenError(0.0, probing=True)
+
+    def before_request(self) -> bool:
+        """Admit a request; return True if it claimed the half-open probe slot."""
+        self.raise_if_open()
+        if self.state == "half_open":
+            self._probing = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        """Close the breaker after a request got a response."""
+        if self._open_until:
+            _LOGGER.info("KakaoMap is responding again; resuming requests")
+        self._failures = 0
+        self._level = 0
+        self._open_until = 0.0
+        self._probing = False
+
+    def record_failure(self, transient: bool, retry_after: float | None = None) -> None:
+        """Account for a failed request."""
+        if not transient:
+            # The server answered; it is reachable even if this stop is not.
+            self.record_success()
+            return
+
+        self._failures += 1
+        was_probing = self._probing
+        self._probing = False
+
+        if retry_after is not None:
+            delay = min(retry_after, self._max_delay)
+        elif was_probing or self._failures >= self._failure_threshold:
+            delay = min(self._max_delay, self._base_delay * 2**self._level)
+            delay *= random.uniform(0.5, 1.0)
+            self._level += 1
+        else:
+            return
+
+        self._open_until = time.monotonic() + delay
+        _LOGGER.warning(
+            "Pausing KakaoMap requests for %.0fs after %s consecutive failures",
+            delay,
+            self._failures,
+        )
+
+    def release_probe(self) -> None:
+        """Give the probe slot back when the probe request was cancelled.
+
+        Only the caller whose ``before_request`` claimed the slot may call
+        this; anyone else would admit a second probe.
+        """
+        self._probing = False
@@ -3,37 +3,61 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 from typing import Any
 
 import voluptuous as vol
 import aiohttp
 import homeassistant.helpers.config_validation as cv
 from homeassistant import config_entries
+from homeassistant.const import CONF_NAME
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.exceptions import HomeAssistantError
 
 from .const import (
     DOMAIN, CONF_STOP_ID, CONF_STOP_NAME, CONF_BUSES, CONF_QUIET_START, CONF_QUIET_END, 
     CONF_SCAN_INTERVAL, DEFAULT_QUIET_START, DEFAULT_QUIET_END, DEFAULT_SCAN_INTERVAL,
-    MIN_SCAN_INTERVAL, MAX_SCAN_INTERVAL
+    MIN_SCAN_INTERVAL, MAX_SCAN_INTERVAL, CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING,
+    CONF_QUIET_SCHEDULE, CONF_MIN_CHANGE, DEFAULT_MIN_CHANGE, MAX_MIN_CHANGE,
+    CONF_LEARN_SERVICE_HOURS, DEFAULT_LEARN_SERVICE_HOURS, CONF_HUB, CONF_STOPS,
+    MAX_HUB_STOPS, DEFAULT_HUB_NAME, CONF_THRESHOLDS, STOP_SEARCH_LIMIT,
 )
-from .api import async_fetch_stop_data, build_bus_labels, describe_api_error
+from .api import build_bus_labels, describe_api_error, is_transient_api_error
+from .breaker import CircuitOpenError
+from .quiet_hours import QuietSchedule
+from .scheduler import async_get_scheduler
+from .stop_index import async_get_stop_index, async_record_stop
+from .thresholds import parse_thresholds
 
 _LOGGER = logging.getLogger(__name__)
 
+
+class CannotConnect(HomeAssistantError):
+    """Error to indicate KakaoMap could not be reached."""
+
+
 async def get_stop_info(
     hass: HomeAssistant, stop_id: str
 ) -> tuple[str, dict[str, str]] | None:
-    """Get stop name and list of buses. Returns (stop_name, {bus_name: label})."""
-    session = async_get_clientsession(hass)
+    """Get stop name and list of buses. Returns (stop_name, {bus_name: label}).
+
+    Returns None when the stop cannot be looked up, and raises CannotConnect
+    when KakaoMap is unreachable or requests are paused by the breaker.
+    """
     try:
-        data = await async_fetch_stop_data(session, stop_id)
+        # Shares the request with a coordinator refreshing the same stop.
+        data = (await async_get_scheduler(hass).async_fetch(stop_id)).decode()
         stop_name = data.get("name", stop_id)
+        async_record_stop(hass, stop_id, data.get("name"))
         return stop_name, build_bus_labels(data)
-    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+    except (
+        aiohttp.ClientError, asyncio.TimeoutError, ValueError, CircuitOpenError
+    ) as err:
         _LOGGER.error("Error fetching stop %s: %s", stop_id, describe_api_error(err))
+        if isinstance(err, aiohttp.ClientConnectionError) or is_transient_api_error(err):
+            raise CannotConnect(describe_api_error(err)) from err
         return None
     except Exception as err:
         _LOGGER.exception(
@@ -44,6 +68,47 @@ async def get_stop_info(
         return None
 
 
+def parse_id_list(text: str) -> list[str]:
+    """Split comma, space or newline separated IDs, dropping duplicates."""
+    return list(dict.fromkeys(part for part in re.split(r"[\s,]+", text) if part))
+
+
+async def get_hub_stops(
+    hass: HomeAssistant, stop_ids: list[str], known: dict[str, str]
+) -> tuple[dict[str, str], list[str]]:
+    """Return ({stop_id: stop_name}, invalid stop IDs) for a hub's stops.
+
+    Stops in ``known`` keep their name; the rest are fetched concurrently.
+    Raises CannotConnect if any of them could not be fetched for that reason.
+    """
+    new_ids = [stop_id for stop_id in stop_ids if stop_id not in known]
+    results = await asyncio.gather(
+        *(get_stop_info(hass, stop_id) for stop_id in new_ids), return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    names = {stop_id: info[0] for stop_id, info in zip(new_ids, results) if info}
+    invalid = [stop_id for stop_id, info in zip(new_ids, results) if not info]
+    return {
+        stop_id: known.get(stop_id) or names[stop_id]
+        for stop_id in stop_ids
+        if stop_id in known or stop_id in names
+    }, invalid
+
+
+def _validate_hub_input(
+    user_input: dict[str, Any], errors: dict[str, str]
+) -> list[str]:
+    """Return the stop IDs of hub input, recording any error in ``errors``."""
+    stop_ids = parse_id_list(user_input[CONF_STOPS])
+    if not stop_ids:
+        errors[CONF_STOPS] = "no_stops"
+    elif len(stop_ids) > MAX_HUB_STOPS:
+        errors[CONF_STOPS] = "too_many_stops"
+    return stop_ids
+
+
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Kakaobus."""
 
@@ -54,34 +119,135 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self.stop_id: str | None = None
         self.stop_name: str | None = None
         self.available_buses: dict[str, str] = {}
+        self.matching_stops: dict[str, str] = {}
 
     async def async_step_user(self, user_input: dict[str, Any] | None = None) -> FlowResult:
-        """Handle the initial step."""
+        """Handle adding a single stop by ID or name, or switching to a hub."""
         errors = {}
 
         if user_input is not None:
-            self.stop_id = user_input[CONF_STOP_ID]
-            
-            # unique_id check
-            await self.async_set_unique_id(self.stop_id)
-            self._abort_if_unique_id_configured()
-
-            # validate and fetch buses
-            info = await get_stop_info(self.hass, self.stop_id)
-            if info:
-                self.stop_name, self.available_buses = info
-                return await self.async_step_select_bus()
+            if user_input.get(CONF_HUB):
+                return await self.async_step_hub()
+
+            query = user_input.get(CONF_STOP_ID, "").strip()
+
+            # Anything that is not a known stop ID is first tried as a name
+            # against the local stop index, without calling the API.
+            index = await async_get_stop_index(self.hass)
+            # Configured stops are left out so picking one cannot abort the flow.
+            configured = self._async_current_ids()
+            found = (
+                index.search(query, STOP_SEARCH_LIMIT + len(configured))
+                if query and index.get(query) is None
+                else []
+            )
+            matches = [stop for stop in found if stop.stop_id not in configured]
+            if matches:
+                self.matching_stops = {
+                    stop.stop_id: " · ".join(
+                        part for part in (stop.name, stop.city, stop.stop_id) if part
+                    )
+                    for stop in matches[:STOP_SEARCH_LIMIT]
+                }
+                return await self.async_step_pick_stop()
+
+            if found:
+                errors["base"] = "already_configured"
             else:
-                errors["base"] = "invalid_stop_id"
+                try:
+                    if query and (result := await self._async_select_stop(query)) is not None:
+                        return result
+                    errors["base"] = "invalid_stop_id"
+                except CannotConnect:
+                    errors["base"] = "cannot_connect"
 
         return self.async_show_form(
             step_id="user",
             data_schema=vol.Schema({
-                vol.Required(CONF_STOP_ID): str,
+                vol.Optional(CONF_STOP_ID, default=""): str,
+                vol.Optional(CONF_HUB, default=False): bool,
             }),
             errors=errors,
         )
 
+    async def async_step_hub(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Handle adding a hub that polls many stops in one entry."""
+        errors: dict[str, str] = {}
+        placeholders = {"invalid": "", "max_stops": str(MAX_HUB_STOPS)}
+
+        if user_input is not None:
+            stop_ids = _validate_hub_input(user_input, errors)
+            if not errors:
+                try:
+                    stops, invalid = await get_hub_stops(self.hass, stop_ids, {})
+                except CannotConnect:
+                    errors["base"] = "cannot_connect"
+                else:
+                    if invalid:
+                        errors[CONF_STOPS] = "invalid_hub_stops"
+                        placeholders["invalid"] = ", ".join(invalid)
+                    else:
+                        buses = parse_id_list(user_input.get(CONF_BUSES, ""))
+                        return self.async_create_entry(
+                            title=user_input[CONF_NAME],
+                            data={CONF_HUB: True, CONF_STOPS: stops},
+                            options={
+                                CONF_STOPS: stops,
+                                CONF_BUSES: buses,
+                                CONF_QUIET_START: DEFAULT_QUIET_START,
+                                CONF_QUIET_END: DEFAULT_QUIET_END,
+                            },
+                        )
+
+        user_input = user_input or {}
+        return self.async_show_form(
+            step_id="hub",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_NAME, default=user_input.get(CONF_NAME, DEFAULT_HUB_NAME)
+                ): str,
+                vol.Required(CONF_STOPS, default=user_input.get(CONF_STOPS, "")): str,
+                vol.Optional(CONF_BUSES, default=user_input.get(CONF_BUSES, "")): str,
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
+
+    async def async_step_pick_stop(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Let the user pick one of the stops matching a name search."""
+        errors = {}
+
+        if user_input is not None:
+            try:
+                if (result := await self._async_select_stop(user_input[CONF_STOP_ID])) is not None:
+                    return result
+                errors["base"] = "invalid_stop_id"
+            except CannotConnect:
+                errors["base"] = "cannot_connect"
+
+        return self.async_show_form(
+            step_id="pick_stop",
+            data_schema=vol.Schema({
+                vol.Required(CONF_STOP_ID): vol.In(self.matching_stops),
+            }),
+            errors=errors,
+        )
+
+    async def _async_select_stop(self, stop_id: str) -> FlowResult | None:
+        """Validate a stop ID and continue with bus selection; None if invalid."""
+        self.stop_id = stop_id
+
+        # unique_id check
+        await self.async_set_unique_id(self.stop_id)
+        self._abort_if_unique_id_configured()
+
+        # validate and fetch buses
+        info = await get_stop_info(self.hass, self.stop_id)
+        if info:
+            self.stop_name, self.available_buses = info
+            return await self.async_step_select_bus()
+        return None
+
     async def async_step_select_bus(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Handle bus selection step."""
         errors = {}
@@ -126,8 +292,75 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     # Note: In newer HA versions, config_entry is a read-only property
     # that is automatically set by the parent class. No __init__ needed.
 
+    def _option(self, key: str, default: Any) -> Any:
+        """Return an option, falling back to entry data, then to the default."""
+        return self.config_entry.options.get(key, self.config_entry.data.get(key, default))
+
+    def _polling_schema(self) -> dict[Any, Any]:
+        """Return the polling, quiet-hours and event fields shared by stops and hubs."""
+        return {
+            vol.Optional(
+                CONF_SCAN_INTERVAL,
+                default=self._option(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
+            ): vol.All(
+                vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)
+            ),
+            vol.Optional(
+                CONF_ADAPTIVE_POLLING,
+                default=self._option(CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING),
+            ): bool,
+            vol.Optional(
+                CONF_LEARN_SERVICE_HOURS,
+                default=self._option(CONF_LEARN_SERVICE_HOURS, DEFAULT_LEARN_SERVICE_HOURS),
+            ): bool,
+            vol.Optional(
+                CONF_MIN_CHANGE, default=self._option(CONF_MIN_CHANGE, DEFAULT_MIN_CHANGE)
+            ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_MIN_CHANGE)),
+            vol.Optional(
+                CONF_QUIET_START, default=self._option(CONF_QUIET_START, DEFAULT_QUIET_START)
+            ): str,
+            vol.Optional(
+                CONF_QUIET_END, default=self._option(CONF_QUIET_END, DEFAULT_QUIET_END)
+            ): str,
+            vol.Optional(
+                CONF_QUIET_SCHEDULE,
+                default=self.config_entry.options.get(CONF_QUIET_SCHEDULE, ""),
+            ): str,
+            vol.Optional(
+                CONF_THRESHOLDS,
+                default=self.config_entry.options.get(CONF_THRESHOLDS, ""),
+            ): str,
+        }
+
+    @staticmethod
+    def _quiet_schedule_valid(user_input: dict[str, Any]) -> bool:
+        """Return True if the submitted quiet hours parse."""
+        try:
+            QuietSchedule.from_options(
+                user_input.get(CONF_QUIET_START, DEFAULT_QUIET_START),
+                user_input.get(CONF_QUIET_END, DEFAULT_QUIET_END),
+                user_input.get(CONF_QUIET_SCHEDULE),
+            )
+        except ValueError as err:
+            _LOGGER.debug("Invalid quiet hours: %s", err)
+            return False
+        return True
+
+    @staticmethod
+    def _thresholds_valid(user_input: dict[str, Any]) -> bool:
+        """Return True if the submitted arrival thresholds parse."""
+        try:
+            parse_thresholds(user_input.get(CONF_THRESHOLDS))
+        except ValueError as err:
+            _LOGGER.debug("Invalid thresholds: %s", err)
+            return False
+        return True
+
     async def async_step_init(self, user_input: dict[str, Any] | None = None) -> FlowResult:
         """Manage the options."""
+        if self.config_entry.data.get(CONF_HUB):
+            return await self.async_step_hub(user_input)
+
         errors = {}
         
         try:
@@ -138,7 +371,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 available_buses = {}
             else:
                 # 1. Fetch latest "Available" buses
-                info = await get_stop_info(self.hass, stop_id)
+                try:
+                    info = await get_stop_info(self.hass, stop_id)
+                except CannotConnect:
+                    info = None
                 if info:
                     _, available_buses = info
                 else:
@@ -146,7 +382,7 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     errors["base"] = "cannot_connect"
 
             # 2. Get "Currently Selected" buses from Options (fallback to Data if migration happened)
-            current_buses = self.config_entry.options.get(CONF_BUSES, self.config_entry.data.get(CONF_BUSES, []))
+            current_buses = self._option(CONF_BUSES, [])
 
             # 3. Ensure all 'current' buses are in the 'available' map.
             for bus in current_buses:
@@ -154,20 +390,17 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     available_buses[bus] = f"{bus} (Not found/Old)"
 
             if user_input is not None:
-                return self.async_create_entry(title="", data=user_input)
-
-            start_def = self.config_entry.options.get(CONF_QUIET_START, self.config_entry.data.get(CONF_QUIET_START, DEFAULT_QUIET_START))
-            end_def = self.config_entry.options.get(CONF_QUIET_END, self.config_entry.data.get(CONF_QUIET_END, DEFAULT_QUIET_END))
-            interval_def = self.config_entry.options.get(CONF_SCAN_INTERVAL, self.config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL))
+                if not self._quiet_schedule_valid(user_input):
+                    errors["base"] = "invalid_quiet_schedule"
+                elif not self._thresholds_valid(user_input):
+                    errors["base"] = "invalid_thresholds"
+                else:
+                    return self.async_create_entry(title="", data=user_input)
 
             return self.async_show_form(
                 step_id="init",
                 data_schema=vol.Schema({
-                    vol.Optional(CONF_SCAN_INTERVAL, default=interval_def): vol.All(
-                        vol.Coerce(int), vol.Range(min=MIN_SCAN_INTERVAL, max=MAX_SCAN_INTERVAL)
-                    ),
-                    vol.Optional(CONF_QUIET_START, default=start_def): str,
-                    vol.Optional(CONF_QUIET_END, default=end_def): str,
+                    **self._polling_schema(),
                     vol.Required(CONF_BUSES, default=current_buses): cv.multi_select(available_buses),
                 }),
                 errors=errors
@@ -175,3 +408,47 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         except Exception as err:
             _LOGGER.exception("Error in options flow: %s", err)
             raise
+
+    async def async_step_hub(self, user_input: dict[str, Any] | None = None) -> FlowResult:
+        """Manage the stops, line filter and polling of a hub."""
+        errors: dict[str, str] = {}
+        placeholders = {"invalid": "", "max_stops": str(MAX_HUB_STOPS)}
+        known: dict[str, str] = self._option(CONF_STOPS, {})
+
+        if user_input is not None:
+            stop_ids = _validate_hub_input(user_input, errors)
+            if not errors and not self._quiet_schedule_valid(user_input):
+                errors["base"] = "invalid_quiet_schedule"
+            if not errors and not self._thresholds_valid(user_input):
+                errors["base"] = "invalid_thresholds"
+            if not errors:
+                try:
+                    stops, invalid = await get_hub_stops(self.hass, stop_ids, known)
+                except CannotConnect:
+                    errors["base"] = "cannot_connect"
+                else:
+                    if invalid:
+                        errors[CONF_STOPS] = "invalid_hub_stops"
+                        placeholders["invalid"] = ", ".join(invalid)
+                    else:
+                        return self.async_create_entry(
+                            title="",
+                            data={
+                                **user_input,
+                                CONF_STOPS: stops,
+                                CONF_BUSES: parse_id_list(user_input.get(CONF_BUSES, "")),
+                            },
+                        )
+
+        return self.async_show_form(
+            step_id="hub",
+            data_schema=vol.Schema({
+                **self._polling_schema(),
+                vol.Required(CONF_STOPS, default=", ".join(known)): str,
+                vol.Optional(
+                    CONF_BUSES, default=", ".join(self._option(CONF_BUSES, []))
+                ): str,
+            }),
+            errors=errors,
+            description_placeholders=placeholders,
+        )
@@ -6,12 +6,91 @@ CONF_STOP_NAME = "stop_name"
 CONF_BUSES = "buses"
 CONF_QUIET_START = "quiet_start"
 CONF_QUIET_END = "quiet_end"
+CONF_QUIET_SCHEDULE = "quiet_schedule"
 CONF_SCAN_INTERVAL = "scan_interval"
+CONF_ADAPTIVE_POLLING = "adaptive_polling"
+CONF_MIN_CHANGE = "min_change"
+CONF_LEARN_SERVICE_HOURS = "learn_service_hours"
+CONF_THRESHOLDS = "thresholds"
+# Hub entries poll many stops: {stop_id: stop_name}, with CONF_BUSES as an
+# optional line filter applied to every stop.
+CONF_HUB = "hub"
+CONF_STOPS = "stops"
 
 DEFAULT_QUIET_START = "00:00:00"
 DEFAULT_QUIET_END = "05:00:00"
 DEFAULT_SCAN_INTERVAL = 90
+DEFAULT_ADAPTIVE_POLLING = False
+DEFAULT_LEARN_SERVICE_HOURS = True
+# Minutes a countdown must move before a sensor writes a new state (0 = every change).
+DEFAULT_MIN_CHANGE = 0
+MAX_MIN_CHANGE = 30
 MIN_SCAN_INTERVAL = 30
 MAX_SCAN_INTERVAL = 600
+# In adaptive mode the next poll happens after this fraction of the nearest ETA.
+ADAPTIVE_ETA_DIVISOR = 3
 DEFAULT_REQUEST_RETRIES = 3
+# Per-request retry backoff (seconds): base * 2 ** (attempt - 1), jittered.
+RETRY_BACKOFF_BASE = 1
+RETRY_BACKOFF_MAX = 8
+# Host-wide circuit breaker shared by all entries.
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_BASE_DELAY = 30
+BREAKER_MAX_DELAY = 900
 DEFAULT_MAX_STALE_UPDATES = 4
+# Sensors count arrivals down locally between polls at this rate (seconds).
+COUNTDOWN_INTERVAL = 15
+# A countdown that has run this far past zero is treated as unknown.
+COUNTDOWN_GRACE = 60
+# Fired when a tracked line's countdown crosses one of its thresholds, and
+# when a bus that was within them has passed the stop.
+EVENT_APPROACHING = f"{DOMAIN}_approaching"
+EVENT_DEPARTED = f"{DOMAIN}_departed"
+# Minutes a countdown must rise above a threshold before it can fire again.
+THRESHOLD_HYSTERESIS = 1
+
+# Number of recent samples kept for rolling latency percentiles.
+METRICS_WINDOW = 100
+
+STORAGE_VERSION = 1
+STORE_SAVE_DELAY = 30
+# Samples kept per line for each hour of the week, and how often the
+# arrival history is written to disk (seconds).
+HISTORY_DEPTH = 8
+HISTORY_SAVE_DELAY = 600
+# Longest poll interval (seconds) during hours learned to have no service.
+IDLE_PROBE_INTERVAL = 1800
+
+DATA_SCHEDULER = "scheduler"
+# Dispatched with the entry ID when the tracked lines of an entry change.
+SIGNAL_BUSES_UPDATED = f"{DOMAIN}_buses_updated_{{}}"
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_REQUESTS_PER_MINUTE = 60
+POLL_JITTER = 0.1
+# Dedicated connection pool for map.kakao.com. Idle connections are kept
+# longer than the default polling interval so polls reuse them.
+CONNECTION_LIMIT_PER_HOST = DEFAULT_MAX_CONCURRENT_REQUESTS
+KEEPALIVE_TIMEOUT = 120
+DNS_CACHE_TTL = 300
+DATA_STOP_INDEX = "stop_index"
+# Stops offered when searching the local stop index by name.
+STOP_SEARCH_LIMIT = 20
+# Upper bound on stops in one kakaomap_bus.get_arrivals call.
+MAX_SERVICE_STOPS = 50
+# Share of the free request budget one get_arrivals call may use; the rest
+# stays free for regular polls.
+SERVICE_BUDGET_SHARE = 0.5
+# Upper bound on stops in one hub entry.
+MAX_HUB_STOPS = 50
+DEFAULT_HUB_NAME = "KakaoMap Bus Hub"
+# A stop fetched this recently (seconds) is served from the last response.
+FETCH_FRESHNESS = 5
+DATA_PROFILER = "profiler"
+# Polls profiled by one kakaomap_bus.profile call, and the cProfile
+# functions listed in its report.
+DEFAULT_PROFILE_UPDATES = 20
+MAX_PROFILE_UPDATES = 1000
+# A profile ends after this many seconds even if fewer updates ran, e.g.
+# during quiet hours.
+PROFILE_MAX_DURATION = 3600
+PROFILE_CPROFILE_LINES = 40
@@ -2,13 +2,23 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Iterable
 from datetime import timedelta, datetime
 import logging
+import time
+from typing import Any
+
 import aiohttp
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr, entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import (
+    async_track_point_in_time,
+    async_track_time_interval,
+)
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
@@ -18,90 +28,356 @@ from homeassistant.util import dt as dt_util
 from .const import (
     DOMAIN, CONF_STOP_ID, CONF_STOP_NAME, CONF_QUIET_START, CONF_QUIET_END, 
     CONF_SCAN_INTERVAL, DEFAULT_QUIET_START, DEFAULT_QUIET_END, DEFAULT_SCAN_INTERVAL,
-    DEFAULT_MAX_STALE_UPDATES,
+    DEFAULT_MAX_STALE_UPDATES, CONF_BUSES, CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING,
+    CONF_MIN_CHANGE, DEFAULT_MIN_CHANGE, CONF_LEARN_SERVICE_HOURS, DEFAULT_LEARN_SERVICE_HOURS,
+    MIN_SCAN_INTERVAL, MAX_SCAN_INTERVAL, ADAPTIVE_ETA_DIVISOR, COUNTDOWN_INTERVAL,
+    STORAGE_VERSION, STORE_SAVE_DELAY, CONF_QUIET_SCHEDULE, SIGNAL_BUSES_UPDATED,
+    HISTORY_SAVE_DELAY, CONF_HUB, CONF_STOPS, CONF_THRESHOLDS, COUNTDOWN_GRACE,
+    EVENT_APPROACHING, EVENT_DEPARTED,
 )
 from .api import (
-    async_fetch_stop_data,
     build_bus_dict,
     describe_api_error,
     is_transient_api_error,
+    parse_stop_body,
 )
+from .breaker import CircuitOpenError
+from .history import LineHistory, ServiceHours
+from .metrics import StopMetrics
+from .profiler import async_get_profiler, profile_span
+from .models import BusArrival, StopSnapshot
+from .quiet_hours import QuietSchedule
+from .scheduler import KakaoBusScheduler
+from .stop_index import async_record_stop
+from .thresholds import ALL_LINES, LineEdges, parse_thresholds
 
 _LOGGER = logging.getLogger(__name__)
 
-class KakaoBusCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching KakaoMap Bus data."""
 
-    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
-        """Initialize."""
-        # Get scan interval from options, fallback to data, fallback to default
-        scan_interval = entry.options.get(
-            CONF_SCAN_INTERVAL, 
-            entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
-        )
-        
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=DOMAIN,
-            update_interval=timedelta(seconds=scan_interval),
-        )
-        self.entry = entry
-        self.stop_id = entry.data[CONF_STOP_ID]
-        self.stop_name = entry.data.get(CONF_STOP_NAME, self.stop_id)
-        self._session = async_get_clientsession(hass)
+def snapshot_store(hass: HomeAssistant, stop_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding the last good snapshot of a stop."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.snapshot.{stop_id}")
+
+
+def history_store(hass: HomeAssistant, stop_id: str) -> Store[dict[str, Any]]:
+    """Return the store holding the arrival history of a stop."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.history.{stop_id}")
+
+
+def compute_adaptive_interval(lines: Iterable[BusArrival]) -> int:
+    """Return the next poll interval in seconds based on the nearest tracked arrival.
+
+    Polls tighten as a bus approaches and back off to the maximum interval
+    when none of the tracked lines has a running vehicle.
+    """
+    nearest: int | None = None
+    for line in lines:
+        if not line.has_vehicle:
+            continue
+        for arrival_time in (line.arrival_time, line.arrival_time_2):
+            if arrival_time > 0 and (nearest is None or arrival_time < nearest):
+                nearest = arrival_time
+
+    if nearest is None:
+        return MAX_SCAN_INTERVAL
+
+    return max(MIN_SCAN_INTERVAL, min(MAX_SCAN_INTERVAL, nearest // ADAPTIVE_ETA_DIVISOR))
+
+
+def tracker_key(entry: ConfigEntry, stop_id: str) -> str:
+    """Return the key of a stop's storage and entities within an entry.
+
+    Single-stop entries keep the plain stop ID; stops of a hub are scoped
+    to the hub so the same stop can also be configured on its own.
+    """
+    return f"{entry.entry_id}_{stop_id}" if entry.data.get(CONF_HUB) else stop_id
+
+
+def entry_stops(entry: ConfigEntry) -> dict[str, str]:
+    """Return the stops of an entry as {stop_id: stop_name}."""
+    if entry.data.get(CONF_HUB):
+        return dict(entry.options.get(CONF_STOPS, entry.data.get(CONF_STOPS, {})))
+    stop_id = entry.data[CONF_STOP_ID]
+    return {stop_id: entry.data.get(CONF_STOP_NAME, stop_id)}
+
+
+class StopTracker:
+    """Fetched arrivals, history and health of one stop of a coordinator.
+
+    A single-stop entry has one tracker, a hub entry one per stop. Each
+    tracker falls back to its own stale data, so a failing stop does not
+    affect the other stops of a hub.
+    """
+
+    def __init__(
+        self,
+        coordinator: KakaoBusCoordinator,
+        key: str,
+        stop_id: str,
+        stop_name: str,
+        buses: list[str] | None,
+    ) -> None:
+        """Initialize; ``buses`` None tracks every line of the stop."""
+        self.coordinator = coordinator
+        self.hass = coordinator.hass
+        self.key = key
+        self.stop_id = stop_id
+        self.stop_name = stop_name
+        self.track_all = buses is None
+        self.buses: list[str] = list(buses or [])
+        self.data: StopSnapshot | None = None
+        # True while the data comes from disk or is replayed after a failure.
+        self.stale = False
+        # False once the stop failed for longer than stale data is replayed.
+        self.available = True
+        self.metrics = StopMetrics()
+        # Seconds until this stop wants to be polled again.
+        self.poll_interval = coordinator.scan_interval.total_seconds()
         self._consecutive_failures = 0
+        self._payload_digest: bytes | None = None
+        # Raw body behind the current data, to re-select lines without a fetch.
+        self._payload_body: bytes | None = None
+        self._store = snapshot_store(self.hass, key)
+        self._history_store = history_store(self.hass, key)
+        self.history: dict[str, LineHistory] = {}
+        self._async_sync_history()
+        self.service_hours = ServiceHours()
+        # Threshold edge state per line, see KakaoBusCoordinator.thresholds.
+        self.edges: dict[str, LineEdges] = {}
 
     @property
-    def _quiet_hours_active(self) -> bool:
-        """Check if we are currently in quiet hours."""
-        
-        # Get config or defaults
-        start_str = self.entry.options.get(CONF_QUIET_START, self.entry.data.get(CONF_QUIET_START, DEFAULT_QUIET_START))
-        end_str = self.entry.options.get(CONF_QUIET_END, self.entry.data.get(CONF_QUIET_END, DEFAULT_QUIET_END))
+    def title(self) -> str:
+        """Return the display name of the stop, "Name (ID)" as entry titles are."""
+        if self.coordinator.hub:
+            return f"{self.stop_name} ({self.stop_id})"
+        return self.coordinator.entry.title
 
-        now = dt_util.now()
-        
-        try:
-            # Parse times (format HH:MM:SS or HH:MM)
-            start_time = datetime.strptime(start_str, "%H:%M:%S").time()
-        except ValueError:
-            try:
-                start_time = datetime.strptime(start_str, "%H:%M").time()
-            except ValueError:
-                return False # Fail safe
+    @callback
+    def async_select_lines(self, buses: list[str] | None) -> bool:
+        """Track other lines; return True if the stop must be fetched again."""
+        track_all = buses is None
+        if track_all == self.track_all and (track_all or list(buses) == self.buses):
+            return False
+        self.track_all = track_all
+        self.buses = list(buses or [])
+        # Service hours were learned for the previous selection.
+        self.service_hours = ServiceHours()
+        if self.data is None:
+            self._async_sync_history()
+            return False
 
-        try:
-            end_time = datetime.strptime(end_str, "%H:%M:%S").time()
-        except ValueError:
+        if self._payload_body is not None:
             try:
-                end_time = datetime.strptime(end_str, "%H:%M").time()
-            except ValueError:
+                lines = build_bus_dict(
+                    parse_stop_body(self._payload_body), None if self.track_all else self.buses
+                )
+            except ValueError as err:
+                _LOGGER.debug("Cannot reuse last payload for %s: %s", self.stop_id, err)
+            else:
+                if self.track_all:
+                    self.buses = list(lines)
+                self._async_sync_history()
+                self.data = StopSnapshot(lines, self.data.fetched_at)
                 return False
 
-        current_time = now.time()
+        # Only restored data is at hand: keep what is still selected and
+        # fetch the rest right away.
+        self._async_sync_history()
+        if not self.track_all:
+            self.data = StopSnapshot(
+                {name: line for name, line in self.data.lines.items() if name in self.buses},
+                self.data.fetched_at,
+            )
+        self._payload_digest = None
+        return True
 
-        if start_time < end_time:
-            return start_time <= current_time <= end_time
-        else: # Crosses midnight
-            return current_time >= start_time or current_time <= end_time
+    @callback
+    def _async_sync_history(self) -> None:
+        """Keep one arrival history per selected line.
 
-    async def _async_update_data(self):
-        """Fetch data from API."""
-        if self._quiet_hours_active:
-            _LOGGER.debug("Quiet hours active, skipping update for %s", self.stop_id)
-            # Return existing data if available, or empty dict to avoid errors
-            return self.data if self.data else {}
+        A stop tracking every line (a hub without a line filter) keeps none:
+        large transfer stops list hundreds of lines, and each history is a
+        few kilobytes in memory and on disk.
+        """
+        if self.track_all:
+            self.history = {}
+            return
+        self.history = {
+            name: self.history.get(name) or LineHistory() for name in self.buses
+        }
+
+    async def async_restore(self) -> None:
+        """Load the last good snapshot from disk so entities start with data."""
+        try:
+            stored_history = await self._history_store.async_load()
+            if stored_history and not self.track_all:
+                self.history = {
+                    name: LineHistory.from_dict(data)
+                    for name, data in stored_history["lines"].items()
+                    if name in self.buses
+                }
+                self._async_sync_history()
+                self.service_hours = ServiceHours.from_dict(stored_history["service_hours"])
+            elif stored_history:
+                # Left over from before the stop tracked every line.
+                await self._history_store.async_remove()
+        except Exception as err:
+            _LOGGER.warning("Could not restore arrival history for %s: %s", self.stop_id, err)
+
+        try:
+            stored = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.warning("Could not restore last data for %s: %s", self.stop_id, err)
+            return
+        if not stored:
+            return
+
+        snapshot = StopSnapshot.from_dict(stored)
+        if self.track_all:
+            self.buses = list(dict.fromkeys([*self.buses, *snapshot.lines]))
+            self._async_sync_history()
+        else:
+            # Drop lines that are no longer selected since the snapshot was saved.
+            snapshot.lines = {
+                name: line for name, line in snapshot.lines.items() if name in self.buses
+            }
+        self.data = snapshot
+        self.stale = True
+        _LOGGER.debug("Restored last data for %s from %s", self.stop_id, snapshot.fetched_at)
+
+    async def async_unload(self) -> None:
+        """Write pending snapshot and history saves now.
+
+        Delayed saves would otherwise fire after the entry is gone and
+        recreate the files that removing the entry deleted.
+        """
+        if self.data is not None:
+            await self._store.async_save(self._data_to_store())
+        await self._history_store.async_save(self._history_to_store())
+
+    async def async_remove_stores(self) -> None:
+        """Delete the saved snapshot and history of the stop."""
+        await self._store.async_remove()
+        await self._history_store.async_remove()
+
+    @callback
+    def _data_to_store(self) -> dict[str, Any]:
+        """Return the current snapshot for storage."""
+        return self.data.as_dict()
+
+    @callback
+    def _history_to_store(self) -> dict[str, Any]:
+        """Return the arrival history and learned service hours for storage."""
+        return {
+            "lines": {name: history.as_dict() for name, history in self.history.items()},
+            "service_hours": self.service_hours.as_dict(),
+        }
 
+    @callback
+    def _async_observe(self, snapshot: StopSnapshot) -> None:
+        """Feed freshly fetched arrivals into the per-line history."""
+        if not self.history:
+            return
+        previous = self.data
+        for name, line in snapshot.lines.items():
+            if (history := self.history.get(name)) is None:
+                continue
+            history.observe(
+                line,
+                snapshot.fetched_at,
+                previous.lines.get(name) if previous else None,
+                previous.fetched_at if previous else None,
+            )
+        self._history_store.async_delay_save(self._history_to_store, HISTORY_SAVE_DELAY)
+
+    def predict_arrival(self, bus_name: str) -> float | None:
+        """Return predicted seconds until the next bus from the arrival history."""
+        if self.data is None or (line := self.data.lines.get(bus_name)) is None:
+            return None
+        if (history := self.history.get(bus_name)) is None:
+            return None
+        return history.predict(line, self.seconds_since_fetch, dt_util.now())
+
+    @property
+    def seconds_since_fetch(self) -> float:
+        """Return how long ago the current data was fetched from KakaoMap."""
+        if self.data is None or self.data.fetched_at is None:
+            return 0.0
+        return (dt_util.utcnow() - self.data.fetched_at).total_seconds()
+
+    def countdown_minutes(self, arrival_time: int) -> int | None:
+        """Return the minutes left for an arrival, counted down since the fetch."""
+        remaining = arrival_time - self.seconds_since_fetch
+        if remaining < -COUNTDOWN_GRACE:
+            # The bus should be long gone; wait for the next poll.
+            return None
+        return round(max(0, remaining) / 60)
+
+    async def async_update(self) -> bool:
+        """Fetch the stop; return True if lines were added to a track-all stop.
+
+        Transient errors keep the last data for a few polls; after that, or
+        for any other error, UpdateFailed is raised.
+        """
+        added = False
         try:
-            data = await async_fetch_stop_data(self._session, self.stop_id)
+            with profile_span(self.hass, self.key, "fetch"):
+                payload = await self.coordinator.scheduler.async_fetch(
+                    self.stop_id, self.metrics
+                )
+            fetched_at = payload.fetched_at
             self._consecutive_failures = 0
-            return build_bus_dict(data)
-        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as err:
+            self.stale = False
+            self.metrics.last_success = fetched_at
+
+            if payload.digest == self._payload_digest and self.data:
+                # Same bytes as the previous poll: the data is still current,
+                # so only move the countdown anchor forward.
+                self.data.fetched_at = fetched_at
+                self.metrics.payloads_unchanged += 1
+                _LOGGER.debug(
+                    "Payload for %s unchanged; skipped parsing (%s of %s polls)",
+                    self.stop_id,
+                    self.metrics.payloads_unchanged,
+                    self.metrics.payloads_unchanged + self.metrics.payloads_changed,
+                )
+                self._async_pick_interval(self.data)
+                return False
+
+            started = time.perf_counter()
+            data = payload.decode()
+            decoded = time.perf_counter()
+            snapshot = StopSnapshot(
+                build_bus_dict(data, None if self.track_all else self.buses), fetched_at
+            )
+            built = time.perf_counter()
+            self.metrics.parse_time.add(built - started)
+            if (profiler := async_get_profiler(self.hass)) is not None:
+                profiler.add(self.key, "decode", decoded - started)
+                profiler.add(self.key, "build", built - decoded)
+            async_record_stop(self.hass, self.stop_id, data.get("name"))
+            if self.track_all and not snapshot.lines.keys() <= set(self.buses):
+                # Lines are never dropped automatically; a stop's payload
+                # lists every line, running or not.
+                self.buses = list(dict.fromkeys([*self.buses, *snapshot.lines]))
+                self._async_sync_history()
+                added = True
+            self._payload_digest = payload.digest
+            self._payload_body = payload.body
+            with profile_span(self.hass, self.key, "history"):
+                self._async_observe(snapshot)
+            self.data = snapshot
+            self.metrics.payloads_changed += 1
+        except (
+            aiohttp.ClientError, asyncio.TimeoutError, ValueError, CircuitOpenError
+        ) as err:
+            self.metrics.failures += 1
             if is_transient_api_error(err) and self.data:
                 self._consecutive_failures += 1
                 if self._consecutive_failures <= DEFAULT_MAX_STALE_UPDATES:
-                    _LOGGER.warning(
+                    # The breaker already logged why requests are paused.
+                    _LOGGER.log(
+                        logging.DEBUG if isinstance(err, CircuitOpenError) else logging.WARNING,
                         "Transient KakaoMap error for %s; keeping last data "
                         "(failed refresh %s/%s): %s",
                         self.stop_id,
@@ -109,7 +385,378 @@ class KakaoBusCoordinator(DataUpdateCoordinator):
                         DEFAULT_MAX_STALE_UPDATES,
                         describe_api_error(err),
                     )
-                    return self.data
+                    self.stale = True
+                    self.metrics.stale_returns += 1
+                    return False
             raise UpdateFailed(describe_api_error(err)) from err
         except Exception as err:
+            self.metrics.failures += 1
             raise UpdateFailed(describe_api_error(err)) from err
+
+        self._store.async_delay_save(self._data_to_store, STORE_SAVE_DELAY)
+        self._async_pick_interval(snapshot)
+        return added
+
+    @callback
+    def _async_pick_interval(self, snapshot: StopSnapshot) -> None:
+        """Set the next poll interval from fresh data and learned service hours."""
+        coordinator = self.coordinator
+        now = dt_util.now()
+        idle = bool(snapshot.lines) and not any(
+            line.has_vehicle for line in snapshot.lines.values()
+        )
+        probe_delay = None
+        # Service hours are learned for a line selection, like the history.
+        if coordinator.learn_service_hours and not self.track_all:
+            self.service_hours.observe(now, idle)
+            self._history_store.async_delay_save(self._history_to_store, HISTORY_SAVE_DELAY)
+            if idle:
+                probe_delay = self.service_hours.idle_probe_delay(now)
+
+        if probe_delay is not None:
+            # No line usually runs now: only probe until service resumes.
+            self.poll_interval = max(coordinator.scan_interval.total_seconds(), probe_delay)
+        elif coordinator.adaptive_polling:
+            self.poll_interval = compute_adaptive_interval(snapshot.lines.values())
+        else:
+            self.poll_interval = coordinator.scan_interval.total_seconds()
+
+
+class KakaoBusCoordinator(DataUpdateCoordinator[dict[str, StopSnapshot]]):
+    """Class to manage fetching KakaoMap Bus data.
+
+    A single-stop entry polls one stop; a hub entry polls all of its stops
+    concurrently in every cycle and publishes them as one snapshot keyed by
+    stop ID. Requests still pass through the shared scheduler, which caps
+    how many run in parallel.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry: ConfigEntry, scheduler: KakaoBusScheduler
+    ) -> None:
+        """Initialize."""
+        # Polling is driven by the shared scheduler, so the coordinator does
+        # not arm its own timer.
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=None,
+            # Returning the same snapshots for unchanged payloads then
+            # skips the listener fan-out entirely.
+            always_update=False,
+        )
+        self.entry = entry
+        self.hub: bool = entry.data.get(CONF_HUB, False)
+        self.scheduler = scheduler
+        self._load_options()
+        self.poll_interval = self.scan_interval
+        self.stops: dict[str, StopTracker] = {}
+        self._async_sync_stops()
+        self._running = False
+        self._unsub_quiet: CALLBACK_TYPE | None = None
+        self._unsub_countdown: CALLBACK_TYPE | None = None
+
+    def _load_options(self) -> None:
+        """Read the entry options, falling back to data, then to defaults."""
+        options = {**self.entry.data, **self.entry.options}
+        self.stop_names = entry_stops(self.entry)
+        buses = list(options.get(CONF_BUSES, []))
+        # A hub without a line filter tracks every line of its stops.
+        self.buses: list[str] | None = None if self.hub and not buses else buses
+        self.adaptive_polling: bool = options.get(
+            CONF_ADAPTIVE_POLLING, DEFAULT_ADAPTIVE_POLLING
+        )
+        self.min_change: int = options.get(CONF_MIN_CHANGE, DEFAULT_MIN_CHANGE)
+        self.learn_service_hours: bool = options.get(
+            CONF_LEARN_SERVICE_HOURS, DEFAULT_LEARN_SERVICE_HOURS
+        )
+        self.scan_interval = timedelta(
+            seconds=options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+        )
+        try:
+            self.quiet_schedule = QuietSchedule.from_options(
+                options.get(CONF_QUIET_START, DEFAULT_QUIET_START),
+                options.get(CONF_QUIET_END, DEFAULT_QUIET_END),
+                options.get(CONF_QUIET_SCHEDULE),
+            )
+        except ValueError as err:
+            # Fail safe: poll around the clock rather than never.
+            _LOGGER.warning("Ignoring invalid quiet hours for %s: %s", self.entry.title, err)
+            self.quiet_schedule = QuietSchedule()
+        try:
+            self.thresholds = parse_thresholds(options.get(CONF_THRESHOLDS))
+        except ValueError as err:
+            _LOGGER.warning("Ignoring invalid thresholds for %s: %s", self.entry.title, err)
+            self.thresholds = {}
+
+    @callback
+    def _async_sync_stops(self) -> list[StopTracker]:
+        """Create trackers for new stops and drop removed ones; return the new ones."""
+        for stop_id in [stop_id for stop_id in self.stops if stop_id not in self.stop_names]:
+            tracker = self.stops.pop(stop_id)
+            self.hass.async_create_task(tracker.async_remove_stores())
+            # The stop's entities go with the tracker; release its device too.
+            device_registry = dr.async_get(self.hass)
+            if device := device_registry.async_get_device(identifiers={(DOMAIN, tracker.key)}):
+                device_registry.async_update_device(
+                    device.id, remove_config_entry_id=self.entry.entry_id
+                )
+
+        added = [
+            StopTracker(self, tracker_key(self.entry, stop_id), stop_id, name, self.buses)
+            for stop_id, name in self.stop_names.items()
+            if stop_id not in self.stops
+        ]
+        self.stops.update((tracker.stop_id, tracker) for tracker in added)
+        return added
+
+    @callback
+    def _async_publish(self) -> None:
+        """Set the combined snapshot from the trackers' data."""
+        self.data = self._combined()
+
+    def _combined(self) -> dict[str, StopSnapshot]:
+        """Return the current snapshot of every stop that has data."""
+        return {
+            stop_id: tracker.data
+            for stop_id, tracker in self.stops.items()
+            if tracker.data is not None
+        }
+
+    async def async_apply_options(self) -> None:
+        """Apply changed options to the running coordinator without a reload."""
+        previous_interval = self.poll_interval
+        was_running = self._running
+        previous_thresholds = self.thresholds
+        self._load_options()
+        if self.thresholds != previous_thresholds:
+            # Start over so new thresholds do not fire for buses already near.
+            for tracker in self.stops.values():
+                tracker.edges = {}
+        if not self.adaptive_polling:
+            self.poll_interval = self.scan_interval
+
+        added = self._async_sync_stops()
+        await asyncio.gather(*(tracker.async_restore() for tracker in added))
+        refetch = bool(added)
+        for tracker in self.stops.values():
+            if tracker not in added and tracker.async_select_lines(self.buses):
+                refetch = True
+
+        # Re-evaluate quiet hours; this suspends or resumes polling as needed.
+        if self._unsub_quiet:
+            self._unsub_quiet()
+            self._unsub_quiet = None
+        self._async_apply_quiet_state(dt_util.now(), refresh_now=True)
+        if was_running and self._running and (
+            refetch or self.poll_interval != previous_interval
+        ):
+            # Re-register to pick up the new interval with a fresh phase.
+            self.scheduler.async_register(self, refresh_now=refetch)
+
+        self._async_publish()
+        async_dispatcher_send(self.hass, SIGNAL_BUSES_UPDATED.format(self.entry.entry_id))
+        self.async_update_listeners()
+
+    async def async_restore(self) -> None:
+        """Load the last good snapshots from disk so entities start with data."""
+        await asyncio.gather(*(tracker.async_restore() for tracker in self.stops.values()))
+        if combined := self._combined():
+            self.data = combined
+
+    @callback
+    def async_start(self) -> None:
+        """Start polling, honoring the quiet-hours schedule."""
+        self._async_apply_quiet_state(dt_util.now(), refresh_now=True)
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling and cancel all timers."""
+        self._async_suspend()
+        if self._unsub_quiet:
+            self._unsub_quiet()
+            self._unsub_quiet = None
+
+    async def async_unload(self) -> None:
+        """Stop polling and flush the stores of every stop."""
+        self.async_stop()
+        await asyncio.gather(*(tracker.async_unload() for tracker in self.stops.values()))
+
+    @callback
+    def _async_apply_quiet_state(self, now: datetime, refresh_now: bool) -> None:
+        """Suspend or resume polling for the current time and arm the next boundary."""
+        if self.quiet_schedule.is_quiet(now):
+            _LOGGER.debug("Quiet hours active, suspending updates for %s", self.entry.title)
+            self._async_suspend()
+        elif not self._running:
+            self._async_resume(refresh_now)
+
+        self._unsub_quiet = None
+        if (next_change := self.quiet_schedule.next_change(now)) is not None:
+            self._unsub_quiet = async_track_point_in_time(
+                self.hass, self._async_quiet_boundary, next_change
+            )
+
+    @callback
+    def _async_quiet_boundary(self, now: datetime) -> None:
+        """Handle entering or leaving a quiet window."""
+        self._async_apply_quiet_state(dt_util.as_local(now), refresh_now=True)
+
+    @callback
+    def _async_resume(self, refresh_now: bool) -> None:
+        """Hand the coordinator to the scheduler and start the countdown."""
+        self._running = True
+        self.scheduler.async_register(self, refresh_now=refresh_now)
+        self._unsub_countdown = async_track_time_interval(
+            self.hass,
+            self._async_countdown_tick,
+            timedelta(seconds=COUNTDOWN_INTERVAL),
+            name=f"{DOMAIN} countdown {self.entry.title}",
+        )
+
+    @callback
+    def _async_suspend(self) -> None:
+        """Stop all polling and countdown wakeups."""
+        self._running = False
+        self.scheduler.async_unregister(self)
+        if self._unsub_countdown:
+            self._unsub_countdown()
+            self._unsub_countdown = None
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update all listeners, timing the state writes while profiling."""
+        self._async_check_thresholds()
+        with profile_span(self.hass, self.entry.entry_id, "state_writes"):
+            super().async_update_listeners()
+
+    @callback
+    def _async_check_thresholds(self) -> None:
+        """Fire events for lines whose countdown crossed one of their thresholds.
+
+        Runs once per update or countdown tick for the whole entry, so
+        automations can use event triggers instead of template triggers
+        re-evaluated on every sensor state change.
+        """
+        if not self.thresholds:
+            return
+        registry: er.EntityRegistry | None = None
+        for tracker in self.stops.values():
+            if tracker.data is None or not tracker.available:
+                continue
+            for name, line in tracker.data.lines.items():
+                thresholds = self.thresholds.get(name, self.thresholds.get(ALL_LINES))
+                if not thresholds:
+                    continue
+                minutes = next_minutes = None
+                if line.has_vehicle and line.arrival_time > 0:
+                    minutes = tracker.countdown_minutes(line.arrival_time)
+                    if line.arrival_time_2 > 0:
+                        next_minutes = tracker.countdown_minutes(line.arrival_time_2)
+                edges = tracker.edges.get(name)
+                if edges is None:
+                    edges = tracker.edges[name] = LineEdges()
+                departed, crossed = edges.update(minutes, next_minutes, thresholds)
+                if not departed and not crossed:
+                    continue
+
+                registry = registry or er.async_get(self.hass)
+                event_data = {
+                    "entry_id": self.entry.entry_id,
+                    # The line's sensor, matching its unique ID.
+                    "entity_id": registry.async_get_entity_id(
+                        "sensor", DOMAIN, f"kakaobus_{tracker.key}_{name}"
+                    ),
+                    "stop_id": tracker.stop_id,
+                    "stop_name": tracker.stop_name,
+                    "line": name,
+                }
+                if departed:
+                    self.hass.bus.async_fire(
+                        EVENT_DEPARTED, {**event_data, "next_minutes": minutes}
+                    )
+                for threshold in crossed:
+                    self.hass.bus.async_fire(
+                        EVENT_APPROACHING,
+                        {
+                            **event_data,
+                            "threshold": threshold,
+                            "minutes": minutes,
+                            "stops_away": line.stop_count,
+                        },
+                    )
+
+    @callback
+    def _async_countdown_tick(self, _now: datetime) -> None:
+        """Let listeners recompute their countdown without fetching."""
+        if self.data and any(snapshot.lines for snapshot in self.data.values()):
+            self.async_update_listeners()
+
+    @property
+    def _quiet_hours_active(self) -> bool:
+        """Check if we are currently in quiet hours."""
+        return self.quiet_schedule.is_quiet(dt_util.now())
+
+    async def _async_update_data(self) -> dict[str, StopSnapshot]:
+        """Fetch every stop concurrently and combine the results.
+
+        A failing stop keeps or loses its own data; the update as a whole
+        only fails when every stop failed.
+        """
+        if self._quiet_hours_active:
+            _LOGGER.debug("Quiet hours active, skipping update for %s", self.entry.title)
+            return self.data if self.data is not None else {}
+
+        trackers = list(self.stops.values())
+        health = [(tracker.stale, tracker.available) for tracker in trackers]
+        results = await asyncio.gather(
+            *(tracker.async_update() for tracker in trackers), return_exceptions=True
+        )
+
+        failures: list[Exception] = []
+        added = False
+        for tracker, result in zip(trackers, results):
+            if isinstance(result, BaseException):
+                if not isinstance(result, Exception):
+                    raise result
+                if tracker.available and self.hub:
+                    _LOGGER.warning(
+                        "Stop %s of %s is unavailable: %s",
+                        tracker.stop_id,
+                        self.entry.title,
+                        result,
+                    )
+                tracker.available = False
+                failures.append(result)
+            else:
+                if not tracker.available and self.hub:
+                    _LOGGER.info(
+                        "Stop %s of %s is available again", tracker.stop_id, self.entry.title
+                    )
+                tracker.available = True
+                added |= result
+
+        if added:
+            async_dispatcher_send(self.hass, SIGNAL_BUSES_UPDATED.format(self.entry.entry_id))
+        if trackers and len(failures) == len(trackers):
+            raise failures[0]
+
+        interval = min(
+            (tracker.poll_interval for tracker in trackers),
+            default=self.scan_interval.total_seconds(),
+        )
+        if interval != self.poll_interval.total_seconds():
+            self.poll_interval = timedelta(seconds=interval)
+            _LOGGER.debug("Next poll for %s in %ss", self.entry.title, interval)
+
+        combined = self._combined()
+        if (
+            self.last_update_success
+            and combined == self.data
+            and health != [(tracker.stale, tracker.available) for tracker in trackers]
+        ):
+            # Unchanged snapshots skip the fan-out, but a stop turning stale
+            # or unavailable (or back) must still reach its sensors.
+            self.async_update_listeners()
+        return combined
@@ -0,0 +1,49 @@
+"""Diagnostics support for HA KakaoMap Bus."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DATA_SCHEDULER, DOMAIN
+from .coordinator import KakaoBusCoordinator
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: KakaoBusCoordinator = hass.data[DOMAIN][entry.entry_id]
+    breaker = hass.data[DOMAIN][DATA_SCHEDULER].breaker
+
+    return {
+        "entry": {
+            "title": entry.title,
+            "data": dict(entry.data),
+            "options": dict(entry.options),
+        },
+        "coordinator": {
+            "hub": coordinator.hub,
+            "poll_interval": coordinator.poll_interval.total_seconds(),
+            "adaptive_polling": coordinator.adaptive_polling,
+            "thresholds": coordinator.thresholds,
+            "last_update_success": coordinator.last_update_success,
+        },
+        "breaker": {"state": breaker.state, "retry_in": breaker.retry_in},
+        "stops": {
+            stop_id: {
+                "available": tracker.available,
+                "stale": tracker.stale,
+                "seconds_since_fetch": tracker.seconds_since_fetch,
+                "poll_interval": tracker.poll_interval,
+                "metrics": tracker.metrics.as_dict(),
+                "history": {
+                    name: history.summary() for name, history in tracker.history.items()
+                },
+                "idle_hours": tracker.service_hours.idle_hours(),
+                "snapshot": tracker.data.as_dict() if tracker.data else None,
+            }
+            for stop_id, tracker in coordinator.stops.items()
+        },
+    }
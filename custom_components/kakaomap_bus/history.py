@@ -0,0 +1,260 @@
+"""Fixed-size arrival history used to predict arrivals without fresh data."""
+from __future__ import annotations
+
+from array import array
+import base64
+from datetime import datetime
+import statistics
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import HISTORY_DEPTH, IDLE_PROBE_INTERVAL
+from .models import BusArrival
+
+# One slot per hour of the week.
+SLOTS = 7 * 24
+# Drift is stored as thousandths of a second late per second elapsed.
+_DRIFT_SCALE = 1000
+_DRIFT_LIMIT = 0.5
+# Longer gaps between polls say nothing about drift.
+_MAX_DRIFT_GAP = 1800
+# Service-hours score bounds; an hour is idle once it scores this low,
+# i.e. after two idle weeks in a row at that weekday and hour.
+_SCORE_LIMIT = 6
+_IDLE_SCORE = -2
+
+
+def time_slot(when: datetime) -> int:
+    """Return the hour-of-week slot of a time, in local time."""
+    local = dt_util.as_local(when)
+    return local.weekday() * 24 + local.hour
+
+
+def _encode(values: array) -> str:
+    """Return an array as base64 text for storage."""
+    return base64.b64encode(values.tobytes()).decode()
+
+
+def _decode(data: str, like: array) -> array | None:
+    """Return stored base64 text as an array shaped like ``like``, or None."""
+    values = array(like.typecode)
+    values.frombytes(base64.b64decode(data))
+    return values if len(values) == len(like) else None
+
+
+class SlotRing:
+    """A ring of the last ``depth`` samples for each of ``slots`` slots.
+
+    All samples live in one flat ``array`` allocated up front, so memory
+    stays the same however many samples are added.
+    """
+
+    __slots__ = ("_depth", "_values", "_cursor", "_count")
+
+    def __init__(self, typecode: str, slots: int = SLOTS, depth: int = HISTORY_DEPTH) -> None:
+        """Initialize."""
+        self._depth = depth
+        self._values = array(typecode, [0]) * (slots * depth)
+        self._cursor = array("B", [0]) * slots
+        self._count = array("B", [0]) * slots
+
+    def add(self, slot: int, value: int) -> None:
+        """Record one sample, overwriting the oldest one of a full slot."""
+        cursor = self._cursor[slot]
+        self._values[slot * self._depth + cursor] = value
+        self._cursor[slot] = (cursor + 1) % self._depth
+        self._count[slot] = min(self._depth, self._count[slot] + 1)
+
+    def samples(self, slot: int) -> int:
+        """Return the number of samples held for a slot."""
+        return self._count[slot]
+
+    def median(self, slot: int) -> float | None:
+        """Return the median sample of a slot, or None without samples."""
+        if not (count := self._count[slot]):
+            return None
+        start = slot * self._depth
+        return statistics.median(self._values[start : start + count])
+
+    def as_dict(self) -> dict[str, str]:
+        """Return a compact JSON-serializable representation."""
+        return {
+            key: _encode(getattr(self, f"_{key}")) for key in ("values", "cursor", "count")
+        }
+
+    def load(self, data: dict[str, str]) -> None:
+        """Restore samples saved by ``as_dict``; ignore data of another shape."""
+        restored = {
+            key: _decode(data[key], getattr(self, f"_{key}"))
+            for key in ("values", "cursor", "count")
+        }
+        if all(values is not None for values in restored.values()):
+            for key, values in restored.items():
+                setattr(self, f"_{key}", values)
+
+
+class LineHistory:
+    """Observed headways and ETA drift of one line, by hour of the week."""
+
+    __slots__ = ("headway", "drift")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # Seconds between the first and second bus.
+        self.headway = SlotRing("H")
+        # How much slower (positive) or faster than real time ETAs count down.
+        self.drift = SlotRing("h")
+
+    def observe(
+        self,
+        line: BusArrival,
+        fetched_at: datetime,
+        previous: BusArrival | None,
+        previous_at: datetime | None,
+    ) -> None:
+        """Learn from a fresh arrival, compared with the previous one."""
+        if not line.has_vehicle or line.arrival_time <= 0:
+            return
+        slot = time_slot(fetched_at)
+
+        if line.arrival_time_2 > line.arrival_time:
+            self.headway.add(slot, min(0xFFFF, line.arrival_time_2 - line.arrival_time))
+
+        if previous is None or previous_at is None or previous.arrival_time <= 0:
+            return
+        elapsed = (fetched_at - previous_at).total_seconds()
+        if not 0 < elapsed <= _MAX_DRIFT_GAP:
+            return
+        expected = previous.arrival_time - elapsed
+        if expected <= 0:
+            return
+        if previous.arrival_time_2 > 0 and abs(
+            line.arrival_time - (previous.arrival_time_2 - elapsed)
+        ) < abs(line.arrival_time - expected):
+            # The first bus has left; this ETA belongs to the one behind it.
+            return
+        rate = max(-_DRIFT_LIMIT, min(_DRIFT_LIMIT, (line.arrival_time - expected) / elapsed))
+        self.drift.add(slot, round(rate * _DRIFT_SCALE))
+
+    def predict(self, line: BusArrival, elapsed: float, now: datetime) -> float | None:
+        """Return the predicted seconds until the next arrival, or None.
+
+        The last known ETAs are counted down at the learned drift rate;
+        once both have passed, buses are assumed to follow at the learned
+        headway for this hour of the week.
+        """
+        slot = time_slot(now)
+        rate = (self.drift.median(slot) or 0) / _DRIFT_SCALE
+        progress = elapsed * (1 - rate)
+
+        last_eta = 0
+        for eta in (line.arrival_time, line.arrival_time_2):
+            if eta <= 0:
+                continue
+            if eta - progress >= 0:
+                return eta - progress
+            last_eta = eta
+
+        headway = self.headway.median(slot)
+        if not last_eta or not headway:
+            return None
+        return (last_eta - progress) % headway
+
+    def summary(self) -> dict[str, int]:
+        """Return sample counts for diagnostics."""
+        return {
+            "headway_samples": sum(self.headway.samples(slot) for slot in range(SLOTS)),
+            "drift_samples": sum(self.drift.samples(slot) for slot in range(SLOTS)),
+        }
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {"headway": self.headway.as_dict(), "drift": self.drift.as_dict()}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> LineHistory:
+        """Restore a history from its stored representation."""
+        history = cls()
+        history.headway.load(data["headway"])
+        history.drift.load(data["drift"])
+        return history
+
+
+class ServiceHours:
+    """Learn, per hour of the week, when none of a stop's lines are running.
+
+    Each hour of the week has a small score. Every calendar hour in which
+    a vehicle is seen raises it by two; every calendar hour seen only with
+    NOVEHICLE lowers it by one. A single sighting therefore ends an idle
+    period immediately, while learning one takes repeated idle weeks.
+    """
+
+    __slots__ = ("_score", "_last_active", "_last_idle")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._score = array("b", [0]) * SLOTS
+        # Hours since the epoch of the last counted observation per slot.
+        self._last_active = array("I", [0]) * SLOTS
+        self._last_idle = array("I", [0]) * SLOTS
+
+    def observe(self, now: datetime, idle: bool) -> None:
+        """Record whether any selected line had a vehicle at ``now``."""
+        slot = time_slot(now)
+        hour = int(now.timestamp() // 3600)
+        if not idle:
+            if self._last_active[slot] != hour:
+                self._last_active[slot] = hour
+                self._score[slot] = min(_SCORE_LIMIT, max(0, self._score[slot]) + 2)
+        elif self._last_idle[slot] != hour and self._last_active[slot] != hour:
+            self._last_idle[slot] = hour
+            self._score[slot] = max(-_SCORE_LIMIT, self._score[slot] - 1)
+
+    def is_idle(self, slot: int) -> bool:
+        """Return True if no line is expected to run during a slot."""
+        return self._score[slot] <= _IDLE_SCORE
+
+    def idle_probe_delay(self, now: datetime) -> float | None:
+        """Return the probe delay for an idle hour, or None if lines should run.
+
+        The delay never reaches past the start of the next hour in which
+        lines are expected to run.
+        """
+        slot = time_slot(now)
+        if not self.is_idle(slot):
+            return None
+        local = dt_util.as_local(now)
+        delay = 3600 - (local.minute * 60 + local.second)
+        for step in range(1, SLOTS):
+            if delay >= IDLE_PROBE_INTERVAL or not self.is_idle((slot + step) % SLOTS):
+                break
+            delay += 3600
+        return min(IDLE_PROBE_INTERVAL, delay)
+
+    def idle_hours(self) -> dict[str, list[int]]:
+        """Return the learned idle hours per weekday for diagnostics."""
+        return {
+            day: [hour for hour in range(24) if self.is_idle(index * 24 + hour)]
+            for index, day in enumerate(("mon", "tue", "wed", "thu", "fri", "sat", "sun"))
+        }
+
+    def as_dict(self) -> dict[str, str]:
+        """Return a compact JSON-serializable representation."""
+        return {
+            key: _encode(getattr(self, f"_{key}"))
+            for key in ("score", "last_active", "last_idle")
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, str]) -> ServiceHours:
+        """Restore learned service hours; start over for data of another shape."""
+        hours = cls()
+        restored = {
+            key: _decode(data[key], getattr(hours, f"_{key}"))
+            for key in ("score", "last_active", "last_idle")
+        }
+        if all(values is not None for values in restored.values()):
+            for key, values in restored.items():
+                setattr(hours, f"_{key}", values)
+        return hours
@@ -0,0 +1,115 @@
+"""Per-stop performance metrics for HA KakaoMap Bus."""
+from __future__ import annotations
+
+from collections import deque
+from datetime import datetime
+from typing import Any
+
+from .const import METRICS_WINDOW
+
+
+class RollingWindow:
+    """Keep the most recent samples and answer percentile queries."""
+
+    __slots__ = ("_samples",)
+
+    def __init__(self, size: int = METRICS_WINDOW) -> None:
+        """Initialize."""
+        self._samples: deque[float] = deque(maxlen=size)
+
+    def add(self, value: float) -> None:
+        """Record one sample."""
+        self._samples.append(value)
+
+    def __len__(self) -> int:
+        """Return the number of samples in the window."""
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float | None:
+        """Return the ``pct`` percentile (nearest rank), or None without samples."""
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self) -> dict[str, float | None]:
+        """Return p50/p95/max of the window."""
+        return {
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self._samples, default=None),
+        }
+
+
+class StopMetrics:
+    """Counters and rolling latencies collected for one stop."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.request_latency = RollingWindow()
+        self.parse_time = RollingWindow()
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.bytes_downloaded = 0
+        self.stale_returns = 0
+        self.payloads_changed = 0
+        self.payloads_unchanged = 0
+        self.last_success: datetime | None = None
+
+    def record_request(self, latency: float, size: int | None) -> None:
+        """Record one HTTP attempt; ``size`` is None when it failed."""
+        self.requests += 1
+        self.request_latency.add(latency)
+        if size is not None:
+            self.bytes_downloaded += size
+
+    def record_retry(self) -> None:
+        """Record that a failed attempt is being retried."""
+        self.retries += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable view for diagnostics and logging."""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "bytes_downloaded": self.bytes_downloaded,
+            "stale_returns": self.stale_returns,
+            "payloads_changed": self.payloads_changed,
+            "payloads_unchanged": self.payloads_unchanged,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "request_latency_s": self.request_latency.summary(),
+            "parse_time_s": self.parse_time.summary(),
+        }
+
+
+class RequestLog:
+    """HTTP attempts of one shared fetch, replayed into every caller's metrics.
+
+    Concurrent callers of the same stop share a single request; each of
+    them copies the attempts into its own StopMetrics once it is done.
+    """
+
+    __slots__ = ("attempts", "retries")
+
+    def __init__(self) -> None:
+        """Initialize."""
+        # (latency, size) per attempt; size is None when it failed.
+        self.attempts: list[tuple[float, int | None]] = []
+        self.retries = 0
+
+    def record_request(self, latency: float, size: int | None) -> None:
+        """Record one HTTP attempt."""
+        self.attempts.append((latency, size))
+
+    def record_retry(self) -> None:
+        """Record that a failed attempt is being retried."""
+        self.retries += 1
+
+    def apply_to(self, metrics: StopMetrics) -> None:
+        """Add the recorded attempts and retries to a caller's metrics."""
+        for latency, size in self.attempts:
+            metrics.record_request(latency, size)
+        metrics.retries += self.retries
@@ -0,0 +1,92 @@
+"""Data models for HA KakaoMap Bus."""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+
+class BusArrival:
+    """Arrival state of one tracked line at a stop."""
+
+    __slots__ = (
+        "name",
+        "arrival_time",
+        "arrival_time_2",
+        "stop_count",
+        "stop_count_2",
+        "direction",
+        "vehicle_type",
+        "realtime_state",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        arrival_time: int = 0,
+        arrival_time_2: int = 0,
+        stop_count: int | None = None,
+        stop_count_2: int | None = None,
+        direction: str | None = None,
+        vehicle_type: str | None = None,
+        realtime_state: str = "",
+    ) -> None:
+        """Initialize."""
+        self.name = name
+        self.arrival_time = arrival_time
+        self.arrival_time_2 = arrival_time_2
+        self.stop_count = stop_count
+        self.stop_count_2 = stop_count_2
+        self.direction = direction
+        self.vehicle_type = vehicle_type
+        self.realtime_state = realtime_state
+
+    @property
+    def has_vehicle(self) -> bool:
+        """Return True when KakaoMap reports a running vehicle for the line."""
+        return self.realtime_state != "NOVEHICLE"
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> BusArrival:
+        """Restore an arrival from its stored representation."""
+        return cls(**{slot: data[slot] for slot in cls.__slots__ if slot in data})
+
+    def __repr__(self) -> str:
+        """Return a compact representation for debugging."""
+        return (
+            f"BusArrival({self.name!r}, {self.arrival_time}, {self.arrival_time_2}, "
+            f"{self.realtime_state!r})"
+        )
+
+
+class StopSnapshot:
+    """Tracked lines of one stop as returned by a single fetch."""
+
+    __slots__ = ("lines", "fetched_at")
+
+    def __init__(self, lines: dict[str, BusArrival], fetched_at: datetime | None) -> None:
+        """Initialize."""
+        self.lines = lines
+        self.fetched_at = fetched_at
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a JSON-serializable representation."""
+        return {
+            "fetched_at": self.fetched_at.isoformat() if self.fetched_at else None,
+            "lines": [line.as_dict() for line in self.lines.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> StopSnapshot:
+        """Restore a snapshot from its stored representation."""
+        lines = (BusArrival.from_dict(line) for line in data.get("lines", []))
+        fetched_at = data.get("fetched_at")
+        return cls(
+            {line.name: line for line in lines},
+            dt_util.parse_datetime(fetched_at) if fetched_at else None,
+        )
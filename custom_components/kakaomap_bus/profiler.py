@@ -0,0 +1,309 @@
+"""On-demand phase timing of stop updates for HA KakaoMap Bus."""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+import cProfile
+import io
+import json
+import logging
+import pstats
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import DATA_PROFILER, DOMAIN, PROFILE_CPROFILE_LINES, PROFILE_MAX_DURATION
+from .metrics import RollingWindow
+
+_LOGGER = logging.getLogger(__name__)
+
+# Order of the phases in the logged summary.
+PHASES = (
+    "total",
+    "fetch",
+    "queued",
+    "dns",
+    "connect",
+    "server",
+    "download",
+    "decode",
+    "build",
+    "history",
+    "state_writes",
+)
+
+
+class UpdateProfiler:
+    """Collect phase timings for the next ``updates`` polls across all stops.
+
+    Timings are only recorded while a poll of the same entry is open, so
+    spans from countdown ticks or service calls between polls are ignored.
+    Profiling ends after ``PROFILE_MAX_DURATION`` seconds even if fewer
+    polls ran, so quiet hours or suspended entries cannot keep it going.
+    """
+
+    def __init__(self, hass: HomeAssistant, updates: int, use_cprofile: bool) -> None:
+        """Initialize and start profiling right away."""
+        self.hass = hass
+        self.remaining = updates
+        self.started = dt_util.utcnow()
+        self.path = hass.config.path(
+            f"{DOMAIN}_profile_{dt_util.as_local(self.started):%Y%m%d_%H%M%S}.json"
+        )
+        self._open: dict[str, dict[str, float]] = {}
+        # Open polls per stop ID, for the phases of the (possibly shared)
+        # request that only knows the stop it fetches.
+        self._open_requests: dict[str, list[dict[str, float]]] = {}
+        self._records: list[dict[str, Any]] = []
+        self._cprofile: cProfile.Profile | None = None
+        if use_cprofile:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self._finished = False
+        self._unsub_timeout: CALLBACK_TYPE | None = async_call_later(
+            hass, PROFILE_MAX_DURATION, self._async_timeout
+        )
+
+    @contextmanager
+    def update(
+        self, name: str, keys: Iterable[str], stop_ids: Iterable[str]
+    ) -> Iterator[None]:
+        """Time one poll of an entry and the phases recorded during it.
+
+        Phases of every key (the entry ID and its tracker keys) add up into
+        one record, so a hub's record sums the phases of all of its stops.
+        Request phases of ``stop_ids`` count for every poll waiting on them.
+        """
+        phases: dict[str, float] = {}
+        keys = list(keys)
+        stop_ids = list(stop_ids)
+        for key in keys:
+            self._open[key] = phases
+        for stop_id in stop_ids:
+            self._open_requests.setdefault(stop_id, []).append(phases)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - started
+            for key in keys:
+                if self._open.get(key) is phases:
+                    del self._open[key]
+            for stop_id in stop_ids:
+                waiting = self._open_requests[stop_id]
+                waiting.remove(phases)
+                if not waiting:
+                    del self._open_requests[stop_id]
+            if self.remaining > 0:
+                self._records.append(
+                    {"entry": name, "stops": len(keys) - 1, "total": total, **phases}
+                )
+                self.remaining -= 1
+                if not self.remaining:
+                    self.async_finish()
+
+    @callback
+    def add(self, key: str, phase: str, seconds: float) -> None:
+        """Add time to a phase of the open poll of an entry or stop tracker."""
+        if (phases := self._open.get(key)) is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    @callback
+    def add_request(self, stop_id: str, phase: str, seconds: float) -> None:
+        """Add time to a request phase of every open poll of the stop."""
+        for phases in self._open_requests.get(stop_id, ()):
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def span(self, key: str, phase: str) -> Iterator[None]:
+        """Time a block as a phase of the open poll of an entry or stop tracker."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(key, phase, time.perf_counter() - started)
+
+    def summary(self) -> dict[str, dict[str, float | None]]:
+        """Return count, mean, p50, p95 and max in milliseconds per phase."""
+        result: dict[str, dict[str, float | None]] = {}
+        for phase in PHASES:
+            samples = [record[phase] for record in self._records if phase in record]
+            if not samples:
+                continue
+            window = RollingWindow(len(samples))
+            for seconds in samples:
+                window.add(seconds)
+            result[phase] = {
+                "n": len(samples),
+                "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+                **{
+                    f"{key}_ms": round(value * 1000, 3)
+                    for key, value in window.summary().items()
+                    if value is not None
+                },
+            }
+        return result
+
+    @callback
+    def _async_timeout(self, _now: Any) -> None:
+        """End profiling once it ran for the maximum duration."""
+        self._unsub_timeout = None
+        _LOGGER.debug(
+            "Profiling ran for %ss with %s updates left; finishing",
+            PROFILE_MAX_DURATION,
+            self.remaining,
+        )
+        self.async_finish()
+
+    @callback
+    def async_finish(self) -> None:
+        """Stop profiling, write the report and log a summary."""
+        if self._finished:
+            return
+        self._finished = True
+        # Polls still open when profiling ends are not recorded.
+        self.remaining = 0
+        if self._unsub_timeout is not None:
+            self._unsub_timeout()
+            self._unsub_timeout = None
+        domain_data = self.hass.data.get(DOMAIN, {})
+        if domain_data.get(DATA_PROFILER) is self:
+            del domain_data[DATA_PROFILER]
+        if self._cprofile is not None:
+            self._cprofile.disable()
+
+        summary = self.summary()
+        report = {
+            "started": self.started.isoformat(),
+            "finished": dt_util.utcnow().isoformat(),
+            "updates": len(self._records),
+            "summary": summary,
+            "records": self._records,
+        }
+        _LOGGER.info(
+            "Profiled %s KakaoMap updates; report written to %s\n%s",
+            len(self._records),
+            self.path,
+            "\n".join(
+                f"  {phase:<13} n={stats['n']:<4} mean {stats['mean_ms']:9.3f} ms  "
+                f"p50 {stats['p50_ms']:9.3f} ms  p95 {stats['p95_ms']:9.3f} ms  "
+                f"max {stats['max_ms']:9.3f} ms"
+                for phase, stats in summary.items()
+            ),
+        )
+        self.hass.async_add_executor_job(self._write_report, report)
+
+    def _write_report(self, report: dict[str, Any]) -> None:
+        """Write the JSON report, and the cProfile output next to it."""
+        if self._cprofile is not None:
+            stats_path = self.path.removesuffix(".json") + ".prof"
+            self._cprofile.dump_stats(stats_path)
+            text = io.StringIO()
+            pstats.Stats(self._cprofile, stream=text).sort_stats(
+                pstats.SortKey.CUMULATIVE
+            ).print_stats(PROFILE_CPROFILE_LINES)
+            report["cprofile"] = {"path": stats_path, "top": text.getvalue()}
+        try:
+            with open(self.path, "w", encoding="utf-8") as file:
+                json.dump(report, file, indent=2)
+        except OSError as err:
+            _LOGGER.error("Could not write profile report to %s: %s", self.path, err)
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> UpdateProfiler | None:
+    """Return the running profiler, if any."""
+    return hass.data.get(DOMAIN, {}).get(DATA_PROFILER)
+
+
+@callback
+def async_start_profiler(
+    hass: HomeAssistant, updates: int, use_cprofile: bool
+) -> UpdateProfiler:
+    """Start profiling the next ``updates`` polls, ending any running profile."""
+    if (running := async_get_profiler(hass)) is not None:
+        running.async_finish()
+    profiler = UpdateProfiler(hass, updates, use_cprofile)
+    hass.data.setdefault(DOMAIN, {})[DATA_PROFILER] = profiler
+    return profiler
+
+
+@callback
+def profile_span(hass: HomeAssistant, key: str, phase: str) -> AbstractContextManager[Any]:
+    """Return a span timing a phase of a poll, or a no-op when not profiling."""
+    if (profiler := async_get_profiler(hass)) is None:
+        return nullcontext()
+    return profiler.span(key, phase)
+
+
+def create_trace_config(hass: HomeAssistant) -> aiohttp.TraceConfig:
+    """Return a trace config feeding connection phases to the running profiler.
+
+    Connection setup shows up as ``queued`` (waiting for a pooled
+    connection), ``dns`` and ``connect`` (TCP and TLS); ``server`` is the
+    time from sending the request to receiving the response headers and
+    ``download`` the time spent reading the body after that; aiohttp
+    reports the body once it has been read in full. Without a
+    running profiler every hook returns right away.
+    """
+    trace_config = aiohttp.TraceConfig()
+
+    def _mark(name: str) -> Any:
+        async def _on_start(
+            _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: Any
+        ) -> None:
+            if async_get_profiler(hass) is not None:
+                setattr(ctx, name, time.perf_counter())
+
+        return _on_start
+
+    def _record(name: str, phase: str) -> Any:
+        async def _on_end(
+            _session: aiohttp.ClientSession, ctx: SimpleNamespace, _params: Any
+        ) -> None:
+            if (
+                (profiler := async_get_profiler(hass)) is not None
+                and (started := getattr(ctx, name, None)) is not None
+                and (stop_id := getattr(ctx, "stop_id", None)) is not None
+            ):
+                profiler.add_request(stop_id, phase, time.perf_counter() - started)
+
+        return _on_end
+
+    async def _on_request_start(
+        _session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        if async_get_profiler(hass) is not None:
+            ctx.stop_id = params.url.query.get("busstopid")
+
+    _record_server = _record("sent_at", "server")
+
+    async def _on_request_end(
+        session: aiohttp.ClientSession,
+        ctx: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        await _record_server(session, ctx, params)
+        # The body is read after the headers arrive.
+        ctx.headers_at = time.perf_counter()
+
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_connection_queued_start.append(_mark("queued_at"))
+    trace_config.on_connection_queued_end.append(_record("queued_at", "queued"))
+    trace_config.on_dns_resolvehost_start.append(_mark("dns_at"))
+    trace_config.on_dns_resolvehost_end.append(_record("dns_at", "dns"))
+    trace_config.on_connection_create_start.append(_mark("connect_at"))
+    trace_config.on_connection_create_end.append(_record("connect_at", "connect"))
+    trace_config.on_request_headers_sent.append(_mark("sent_at"))
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_response_chunk_received.append(_record("headers_at", "download"))
+    trace_config.freeze()
+    return trace_config
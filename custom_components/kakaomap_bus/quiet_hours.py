@@ -0,0 +1,130 @@
+"""Quiet-hours schedule for HA KakaoMap Bus."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+_DAY_SECONDS = 86400
+_WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+_ALL_DAYS = ("daily", "*")
+
+
+def _parse_time(value: str) -> int:
+    """Parse HH:MM or HH:MM:SS into seconds since midnight (24:00 allowed)."""
+    parts = value.strip().split(":")
+    if len(parts) not in (2, 3) or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid time '{value}', expected HH:MM or HH:MM:SS")
+
+    hours, minutes = int(parts[0]), int(parts[1])
+    seconds = int(parts[2]) if len(parts) == 3 else 0
+    total = hours * 3600 + minutes * 60 + seconds
+    if minutes > 59 or seconds > 59 or total > _DAY_SECONDS:
+        raise ValueError(f"Invalid time '{value}'")
+    return total
+
+
+def _parse_days(value: str) -> list[int]:
+    """Parse 'mon-fri', 'sat,sun' or 'daily' into weekday numbers."""
+    value = value.strip().lower()
+    if value in _ALL_DAYS:
+        return list(range(7))
+
+    days: list[int] = []
+    for part in value.split(","):
+        first, _, last = part.strip().partition("-")
+        if first not in _WEEKDAYS or (last and last not in _WEEKDAYS):
+            raise ValueError(f"Invalid weekday '{part.strip()}'")
+        start = _WEEKDAYS.index(first)
+        end = _WEEKDAYS.index(last) if last else start
+        # Ranges may wrap around the week, e.g. 'sat-mon'.
+        days.extend((start + offset) % 7 for offset in range((end - start) % 7 + 1))
+    return days
+
+
+class QuietSchedule:
+    """Quiet windows per weekday, parsed once from the entry options.
+
+    Windows are half-open ``[start, end)`` second offsets from local
+    midnight. A window that crosses midnight is split so the remainder
+    belongs to the following weekday.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty schedule."""
+        self._windows: list[list[tuple[int, int]]] = [[] for _ in range(7)]
+
+    @classmethod
+    def parse(cls, schedule: str) -> QuietSchedule:
+        """Parse 'mon-fri 00:00-05:00; sat,sun 00:00-07:00, 23:30-24:00'.
+
+        Raise ValueError when the schedule is malformed.
+        """
+        quiet = cls()
+        for rule in filter(None, (rule.strip() for rule in schedule.split(";"))):
+            days, _, ranges = rule.partition(" ")
+            if not ranges.strip():
+                raise ValueError(f"Missing time range in '{rule}'")
+            for weekday in _parse_days(days):
+                for window in ranges.split(","):
+                    start, sep, end = window.partition("-")
+                    if not sep:
+                        raise ValueError(f"Invalid time range '{window.strip()}'")
+                    quiet.add_window(weekday, _parse_time(start), _parse_time(end))
+        return quiet
+
+    @classmethod
+    def from_options(cls, start: str, end: str, schedule: str | None) -> QuietSchedule:
+        """Build the schedule from a weekday schedule or the legacy daily window."""
+        if schedule and schedule.strip():
+            return cls.parse(schedule)
+        return cls.parse(f"daily {start}-{end}")
+
+    def add_window(self, weekday: int, start: int, end: int) -> None:
+        """Add a quiet window, splitting it at midnight when needed."""
+        if start == end:
+            return
+        if start < end:
+            self._add(weekday, start, end)
+            return
+        self._add(weekday, start, _DAY_SECONDS)
+        self._add((weekday + 1) % 7, 0, end)
+
+    def _add(self, weekday: int, start: int, end: int) -> None:
+        """Insert a same-day window and merge overlaps."""
+        merged: list[tuple[int, int]] = []
+        for window_start, window_end in sorted([*self._windows[weekday], (start, end)]):
+            if merged and window_start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], window_end))
+            else:
+                merged.append((window_start, window_end))
+        self._windows[weekday] = merged
+
+    def __bool__(self) -> bool:
+        """Return True when at least one quiet window is configured."""
+        return any(self._windows)
+
+    def is_quiet(self, now: datetime) -> bool:
+        """Return True when ``now`` (local time) falls in a quiet window."""
+        offset = now.hour * 3600 + now.minute * 60 + now.second
+        return any(start <= offset < end for start, end in self._windows[now.weekday()])
+
+    def next_change(self, now: datetime) -> datetime | None:
+        """Return the next time the quiet state flips, or None if it never does."""
+        quiet_now = self.is_quiet(now)
+        day_start = dt_util.start_of_local_day(now)
+
+        for day_offset in range(8):
+            day = day_start + timedelta(days=day_offset)
+            boundaries = sorted(
+                {
+                    boundary
+                    for window in self._windows[day.weekday()]
+                    for boundary in window
+                }
+            )
+            for boundary in boundaries:
+                moment = day + timedelta(seconds=boundary)
+                if moment > now and self.is_quiet(moment) != quiet_now:
+                    return moment
+        return None
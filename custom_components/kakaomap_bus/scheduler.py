@@ -0,0 +1,320 @@
+"""Shared polling scheduler for HA KakaoMap Bus."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from functools import partial
+import logging
+import random
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HassJob, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util, ssl as ssl_util
+
+from .api import REQUEST_HEADERS, StopPayload, async_fetch_stop_body
+from .breaker import CircuitBreaker
+from .const import (
+    CONNECTION_LIMIT_PER_HOST,
+    DATA_SCHEDULER,
+    DNS_CACHE_TTL,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_REQUESTS_PER_MINUTE,
+    DOMAIN,
+    FETCH_FRESHNESS,
+    KEEPALIVE_TIMEOUT,
+    POLL_JITTER,
+)
+from .metrics import RequestLog, StopMetrics
+from .profiler import async_get_profiler, create_trace_config
+
+if TYPE_CHECKING:
+    from .coordinator import KakaoBusCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fractional part of the golden ratio. Successive multiples modulo 1 stay
+# evenly spread over [0, 1) no matter how many stops end up registered.
+_PHASE_STEP = 0.6180339887498949
+_BUDGET_WINDOW = 60.0
+
+
+@callback
+def async_create_session(
+    trace_configs: list[aiohttp.TraceConfig] | None = None,
+) -> aiohttp.ClientSession:
+    """Create the integration's own session for map.kakao.com.
+
+    Unlike Home Assistant's shared session, its pool only serves KakaoMap,
+    so keep-alive connections and cached DNS answers survive between polls
+    instead of being evicted by other integrations.
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=CONNECTION_LIMIT_PER_HOST,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
+        ttl_dns_cache=DNS_CACHE_TTL,
+        ssl=ssl_util.get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector, headers=REQUEST_HEADERS, trace_configs=trace_configs
+    )
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> KakaoBusScheduler:
+    """Return the domain-wide scheduler, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    scheduler: KakaoBusScheduler | None = domain_data.get(DATA_SCHEDULER)
+    if scheduler is None:
+        scheduler = KakaoBusScheduler(
+            hass, async_create_session([create_trace_config(hass)])
+        )
+        domain_data[DATA_SCHEDULER] = scheduler
+    return scheduler
+
+
+class KakaoBusScheduler:
+    """Own polling for every configured stop under one request budget.
+
+    Each registered coordinator gets a fixed phase within its interval so
+    fetches are spread out instead of bursting, and every request made on
+    behalf of any stop passes through a shared concurrency cap and a
+    sliding-window requests-per-minute limit. A shared circuit breaker
+    pauses all requests while KakaoMap is failing or rate limiting.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: aiohttp.ClientSession,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        requests_per_minute: int = DEFAULT_REQUESTS_PER_MINUTE,
+        freshness: float = FETCH_FRESHNESS,
+    ) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._session = session
+        self.breaker = CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self._requests_per_minute = max(1, requests_per_minute)
+        self._budget_lock = asyncio.Lock()
+        self._request_times: deque[float] = deque()
+        self._coordinators: dict[str, KakaoBusCoordinator] = {}
+        self._due: dict[str, float] = {}
+        self._unsub: dict[str, CALLBACK_TYPE] = {}
+        self._slots = 0
+        self._inflight: dict[str, tuple[asyncio.Task[StopPayload], RequestLog]] = {}
+        self._recent: dict[str, StopPayload] = {}
+        self._freshness = freshness
+        # The scheduler owns the session and closes it with Home Assistant.
+        self._unsub_close: CALLBACK_TYPE | None = hass.bus.async_listen_once(
+            EVENT_HOMEASSISTANT_CLOSE, self._async_handle_close
+        )
+
+    async def _async_handle_close(self, _event: Event) -> None:
+        """Close the session when Home Assistant shuts down."""
+        self._unsub_close = None
+        await self.async_close()
+
+    async def async_close(self) -> None:
+        """Cancel pending work and close the session; called on last unload."""
+        if self._unsub_close:
+            self._unsub_close()
+            self._unsub_close = None
+        for unsub in self._unsub.values():
+            unsub()
+        self._unsub.clear()
+        for task, _log in self._inflight.values():
+            task.cancel()
+        if not self._session.closed:
+            await self._session.close()
+
+    @property
+    def coordinators(self) -> list[KakaoBusCoordinator]:
+        """Return the coordinators currently being polled."""
+        return list(self._coordinators.values())
+
+    @callback
+    def async_register(
+        self, coordinator: KakaoBusCoordinator, refresh_now: bool = False
+    ) -> None:
+        """Start polling a coordinator at its own phase within the interval.
+
+        With ``refresh_now`` one extra poll runs right away in the background;
+        regular polling still follows the assigned phase afterwards.
+        """
+        key = coordinator.entry.entry_id
+        self.async_unregister(coordinator)
+
+        interval = coordinator.poll_interval.total_seconds()
+        phase = (self._slots * _PHASE_STEP) % 1.0
+        self._slots += 1
+
+        self._coordinators[key] = coordinator
+        self._due[key] = self.hass.loop.time() + interval * phase
+        if refresh_now:
+            self._unsub[key] = async_call_later(
+                self.hass, 0, HassJob(partial(self._async_start_poll, key))
+            )
+        else:
+            self._async_schedule(key)
+
+    @callback
+    def async_unregister(self, coordinator: KakaoBusCoordinator) -> None:
+        """Stop polling a coordinator."""
+        key = coordinator.entry.entry_id
+        if unsub := self._unsub.pop(key, None):
+            unsub()
+        self._coordinators.pop(key, None)
+        self._due.pop(key, None)
+
+    @callback
+    def _async_schedule(self, key: str) -> None:
+        """Arm the timer for the next poll of a coordinator."""
+        coordinator = self._coordinators[key]
+        jitter = random.uniform(0, POLL_JITTER) * coordinator.poll_interval.total_seconds()
+        delay = max(0.0, self._due[key] - self.hass.loop.time()) + jitter
+        self._unsub[key] = async_call_later(
+            self.hass, delay, HassJob(partial(self._async_start_poll, key))
+        )
+
+    @callback
+    def _async_start_poll(self, key: str, _now: Any) -> None:
+        """Run a poll as a background task so it never holds up startup."""
+        self._unsub.pop(key, None)
+        coordinator = self._coordinators.get(key)
+        if coordinator is None:
+            return
+        self.hass.async_create_background_task(
+            self._async_poll(key, coordinator),
+            name=f"{DOMAIN} poll {coordinator.entry.title}",
+        )
+
+    async def _async_poll(self, key: str, coordinator: KakaoBusCoordinator) -> None:
+        """Refresh one coordinator and schedule its next poll."""
+        if (profiler := async_get_profiler(self.hass)) is None:
+            await coordinator.async_refresh()
+        else:
+            with profiler.update(
+                coordinator.entry.title,
+                [
+                    coordinator.entry.entry_id,
+                    *(tracker.key for tracker in coordinator.stops.values()),
+                ],
+                coordinator.stops,
+            ):
+                await coordinator.async_refresh()
+
+        # The entry may have been unloaded or re-registered while refreshing.
+        if self._coordinators.get(key) is not coordinator or key in self._unsub:
+            return
+
+        # Anchor on the previous due time so jitter does not accumulate and
+        # slowly collapse the spread between stops.
+        now = self.hass.loop.time()
+        interval = coordinator.poll_interval.total_seconds()
+        due = self._due[key]
+        if due <= now:
+            due += interval
+            if due <= now:
+                due = now + interval
+        self._due[key] = due
+        self._async_schedule(key)
+
+    async def _async_acquire_budget(self) -> None:
+        """Wait until one more request fits in the requests-per-minute window."""
+        async with self._budget_lock:
+            now = self.hass.loop.time()
+            while self._request_times and now - self._request_times[0] >= _BUDGET_WINDOW:
+                self._request_times.popleft()
+
+            if len(self._request_times) >= self._requests_per_minute:
+                wait = _BUDGET_WINDOW - (now - self._request_times[0])
+                _LOGGER.debug("Request budget exhausted; delaying fetch by %.1fs", wait)
+                await asyncio.sleep(wait)
+                self._request_times.popleft()
+
+            self._request_times.append(self.hass.loop.time())
+
+    @callback
+    def needs_request(self, stop_id: str) -> bool:
+        """Return True if fetching the stop now would send a new request."""
+        recent = self._recent.get(stop_id)
+        if recent is not None and self.hass.loop.time() - recent.received < self._freshness:
+            return False
+        return stop_id not in self._inflight
+
+    @callback
+    def budget_left(self) -> int:
+        """Return how many more requests fit in the budget without waiting.
+
+        Requests in flight count as spent, whether or not they already took
+        their place in the window.
+        """
+        now = self.hass.loop.time()
+        spent = sum(1 for sent in self._request_times if now - sent < _BUDGET_WINDOW)
+        return max(0, self._requests_per_minute - spent - len(self._inflight))
+
+    async def async_fetch(
+        self, stop_id: str, metrics: StopMetrics | None = None
+    ) -> StopPayload:
+        """Return a stop payload, sharing requests between concurrent callers.
+
+        A response received within the freshness window is reused, and a
+        caller arriving while the same stop is already being fetched waits
+        for that request instead of starting another one.
+        """
+        recent = self._recent.get(stop_id)
+        if recent is not None and self.hass.loop.time() - recent.received < self._freshness:
+            return recent
+
+        if (inflight := self._inflight.get(stop_id)) is None:
+            log = RequestLog()
+            task = self.hass.async_create_background_task(
+                self._async_fetch_new(stop_id, log),
+                name=f"{DOMAIN} fetch {stop_id}",
+            )
+            inflight = self._inflight[stop_id] = (task, log)
+            task.add_done_callback(partial(self._async_fetch_done, stop_id))
+        task, log = inflight
+
+        try:
+            # A cancelled caller must not cancel the request other callers share.
+            return await asyncio.shield(task)
+        finally:
+            # Every caller of a shared request sees its attempts, whoever started it.
+            if metrics is not None and task.done():
+                log.apply_to(metrics)
+
+    @callback
+    def _async_fetch_done(self, stop_id: str, task: asyncio.Task[StopPayload]) -> None:
+        """Drop a finished request from the in-flight registry."""
+        self._inflight.pop(stop_id, None)
+        if not task.cancelled():
+            # Mark the exception retrieved even if every caller went away.
+            task.exception()
+
+    async def _async_fetch_new(self, stop_id: str, log: RequestLog) -> StopPayload:
+        """Fetch one stop within the shared concurrency and rate budget.
+
+        Raise CircuitOpenError right away while the shared breaker is open so
+        doomed requests neither wait for nor consume the budget.
+        """
+        self.breaker.raise_if_open()
+        async with self._semaphore:
+            await self._async_acquire_budget()
+            body = await async_fetch_stop_body(
+                self._session, stop_id, metrics=log, breaker=self.breaker
+            )
+
+        now = self.hass.loop.time()
+        payload = StopPayload(stop_id, body, dt_util.utcnow(), now)
+        for key in [
+            key for key, value in self._recent.items() if now - value.received >= self._freshness
+        ]:
+            del self._recent[key]
+        self._recent[stop_id] = payload
+        return payload
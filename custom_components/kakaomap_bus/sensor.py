@@ -1,21 +1,118 @@
 """Sensor for KakaoMap Bus."""
 from __future__ import annotations
 
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
 import logging
 
 from typing import Any
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.util import slugify
-from .const import DOMAIN, CONF_BUSES, CONF_STOP_ID, CONF_STOP_NAME
-from .coordinator import KakaoBusCoordinator
+from .const import DOMAIN, SIGNAL_BUSES_UPDATED
+from .coordinator import KakaoBusCoordinator, StopTracker
+from .metrics import StopMetrics
+from .models import BusArrival
 
 _LOGGER = logging.getLogger(__name__)
 
+
+def _ms(seconds: float | None) -> float | None:
+    """Convert a latency in seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+@dataclass(frozen=True, kw_only=True)
+class KakaoBusMetricDescription(SensorEntityDescription):
+    """Describe a per-stop diagnostic metric sensor."""
+
+    value_fn: Callable[[StopMetrics], float | int | datetime | None]
+
+
+METRIC_SENSORS: tuple[KakaoBusMetricDescription, ...] = (
+    KakaoBusMetricDescription(
+        key="request_latency_p50",
+        translation_key="request_latency_p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _ms(metrics.request_latency.percentile(50)),
+    ),
+    KakaoBusMetricDescription(
+        key="request_latency_p95",
+        translation_key="request_latency_p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _ms(metrics.request_latency.percentile(95)),
+    ),
+    KakaoBusMetricDescription(
+        key="parse_time_p95",
+        translation_key="parse_time_p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: _ms(metrics.parse_time.percentile(95)),
+    ),
+    KakaoBusMetricDescription(
+        key="retries",
+        translation_key="retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.retries,
+    ),
+    KakaoBusMetricDescription(
+        key="bytes_downloaded",
+        translation_key="bytes_downloaded",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_downloaded,
+    ),
+    KakaoBusMetricDescription(
+        key="stale_returns",
+        translation_key="stale_returns",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.stale_returns,
+    ),
+    KakaoBusMetricDescription(
+        key="last_success",
+        translation_key="last_success",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        value_fn=lambda metrics: metrics.last_success,
+    ),
+)
+
+
+def stop_device_info(tracker: StopTracker) -> DeviceInfo:
+    """Return device registry information for a bus stop.
+
+    The device is keyed like the tracker, so a hub stop gets its own device
+    instead of sharing one with a single-stop entry for the same stop.
+    """
+    stop_id = tracker.stop_id
+    return DeviceInfo(
+        identifiers={(DOMAIN, tracker.key)},
+        name=tracker.stop_name,
+        manufacturer="KakaoMap",
+        model="Bus Stop",
+        configuration_url=f"https://map.kakao.com/bus/stop.json?busstopid={stop_id}",
+        # No suggested_area - prevents the forced area selection dialog
+    )
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -23,26 +120,100 @@ async def async_setup_entry(
 ) -> None:
     """Set up the sensor platform."""
     coordinator: KakaoBusCoordinator = hass.data[DOMAIN][entry.entry_id]
-    
-    # Get selected buses from options (or data during first setup)
-    selected_buses = entry.options.get(CONF_BUSES, entry.data.get(CONF_BUSES, []))
-    
-    entities = []
-    for bus_name in selected_buses:
-        entities.append(KakaoBusSensor(coordinator, bus_name))
+    bus_sensors: dict[tuple[str, str], KakaoBusSensor] = {}
+    metric_sensors: dict[str, list[KakaoBusMetricSensor]] = {}
+
+    @callback
+    def async_remove_sensor(sensor: SensorEntity) -> None:
+        """Remove a sensor that is no longer tracked."""
+        if sensor.registry_entry is not None:
+            # Removing the registry entry also removes the entity.
+            er.async_get(hass).async_remove(sensor.entity_id)
+        else:
+            hass.async_create_task(sensor.async_remove())
+
+    @callback
+    def async_sync_sensors() -> None:
+        """Add sensors for new stops and lines and remove those no longer tracked."""
+        for key, sensor in list(bus_sensors.items()):
+            tracker = sensor.tracker
+            if (
+                coordinator.stops.get(tracker.stop_id) is not tracker
+                or sensor.bus_name not in tracker.buses
+            ):
+                async_remove_sensor(bus_sensors.pop(key))
+        for stop_id, sensors in list(metric_sensors.items()):
+            if coordinator.stops.get(stop_id) is not sensors[0].tracker:
+                for sensor in metric_sensors.pop(stop_id):
+                    async_remove_sensor(sensor)
+
+        new_sensors: list[SensorEntity] = []
+        for stop_id, tracker in coordinator.stops.items():
+            for bus_name in tracker.buses:
+                if (stop_id, bus_name) not in bus_sensors:
+                    sensor = bus_sensors[stop_id, bus_name] = KakaoBusSensor(tracker, bus_name)
+                    new_sensors.append(sensor)
+            if stop_id not in metric_sensors:
+                metric_sensors[stop_id] = [
+                    KakaoBusMetricSensor(tracker, description) for description in METRIC_SENSORS
+                ]
+                new_sensors.extend(metric_sensors[stop_id])
+        if new_sensors:
+            async_add_entities(new_sensors)
+
+    async_sync_sensors()
+    entry.async_on_unload(
+        async_dispatcher_connect(
+            hass, SIGNAL_BUSES_UPDATED.format(entry.entry_id), async_sync_sensors
+        )
+    )
+
+
+class ChangeOnlyEntity(CoordinatorEntity[KakaoBusCoordinator]):
+    """Coordinator entity that writes its state only when it changed.
+
+    Countdown ticks notify every listener every few seconds; most of them
+    change nothing for a given entity.
+    """
 
-    async_add_entities(entities)
+    # (available, state, attributes) as last written to the state machine.
+    _written: tuple[bool, Any, dict[str, Any] | None] | None = None
 
+    async def async_added_to_hass(self) -> None:
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._written = (self.available, self.native_value, self.extra_state_attributes)
 
-class KakaoBusSensor(CoordinatorEntity, SensorEntity):
+    def _below_min_change(self, value: Any, attrs: dict[str, Any] | None) -> bool:
+        """Return True if a changed state is still too small to write."""
+        return False
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when the value or an attribute changed."""
+        available = self.available
+        value = self.native_value
+        attrs = self.extra_state_attributes
+        if self._written is not None and available == self._written[0]:
+            if (value, attrs) == self._written[1:] or self._below_min_change(value, attrs):
+                return
+        self._written = (available, value, attrs)
+        self.async_write_ha_state()
+
+
+class KakaoBusSensor(ChangeOnlyEntity, SensorEntity):
     """KakaoBus Sensor class."""
 
-    def __init__(self, coordinator: KakaoBusCoordinator, bus_name: str) -> None:
+    # Fixed per line and stop; keep them out of every recorded state row.
+    _unrecorded_attributes = frozenset({"direction", "stop_name", "vehicle_type"})
+
+    def __init__(self, tracker: StopTracker, bus_name: str) -> None:
         """Initialize."""
-        super().__init__(coordinator)
+        super().__init__(tracker.coordinator)
+        self.tracker = tracker
         self.bus_name = bus_name
-        self.stop_id = coordinator.stop_id
-        self.stop_name = coordinator.stop_name
+        self.stop_id = tracker.stop_id
+        self.stop_name = tracker.stop_name
         
         # Entity naming:
         # - unique_id: Used internally for tracking (must be stable)
@@ -51,7 +222,7 @@ class KakaoBusSensor(CoordinatorEntity, SensorEntity):
         
         self._attr_has_entity_name = True
         self._attr_name = f"{bus_name}"
-        self._attr_unique_id = f"kakaobus_{self.stop_id}_{bus_name}"
+        self._attr_unique_id = f"kakaobus_{tracker.key}_{bus_name}"
         self._attr_native_unit_of_measurement = "min"
         self._attr_icon = "mdi:bus-clock"
         self._attr_suggested_object_id = (
@@ -62,45 +233,78 @@ class KakaoBusSensor(CoordinatorEntity, SensorEntity):
     @property
     def device_info(self) -> DeviceInfo:
         """Return device registry information."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self.stop_id)},
-            name=self.stop_name,
-            manufacturer="KakaoMap",
-            model="Bus Stop",
-            configuration_url=f"https://map.kakao.com/bus/stop.json?busstopid={self.stop_id}",
-            # No suggested_area - prevents the forced area selection dialog
-        )
+        return stop_device_info(self.tracker)
+
+    def _below_min_change(self, value: int | None, attrs: dict[str, Any]) -> bool:
+        """Return True if only the countdown moved, by less than the threshold."""
+        _, written_value, written_attrs = self._written
+        if not self.coordinator.min_change or value is None or written_value is None:
+            return False
+        if abs(value - written_value) >= self.coordinator.min_change:
+            return False
+        # Any other attribute change (stops away, staleness...) is still written.
+        ignored = ("next_bus_min",)
+        return {k: v for k, v in attrs.items() if k not in ignored} == {
+            k: v for k, v in written_attrs.items() if k not in ignored
+        }
+
+    def _countdown_minutes(self, arrival_time: int) -> int | None:
+        """Return the minutes left for an arrival, counted down since the fetch."""
+        return self.tracker.countdown_minutes(arrival_time)
 
     @property
-    def native_value(self) -> int | None:
-        """Return the minutes until arrival."""
-        if not self.coordinator.data:
-            return None
-            
-        line_data = self.coordinator.data.get(self.bus_name)
-        if not line_data:
+    def _line(self) -> BusArrival | None:
+        """Return the latest arrival data for this bus."""
+        if not self.tracker.data:
             return None
-        
-        # Check "NOVEHICLE" or arrivalTime == 0
-        realtime_state = line_data.get("realtimeState", "")
-        # The arriving object
-        arrival = line_data.get("arrival", {})
-        arrival_time = arrival.get("arrivalTime", 0)
+        return self.tracker.data.lines.get(self.bus_name)
+
+    @property
+    def _fetch_ok(self) -> bool:
+        """Return False once fetching this stop has failed for too long."""
+        return super().available and self.tracker.available
+
+    def _predicted_minutes(self) -> int | None:
+        """Return the minutes until arrival predicted from the arrival history."""
+        seconds = self.tracker.predict_arrival(self.bus_name)
+        return None if seconds is None else round(seconds / 60)
 
-        if realtime_state == "NOVEHICLE" or arrival_time == 0:
+    def _arrival(self) -> tuple[int | None, bool]:
+        """Return the minutes until arrival and whether they are predicted."""
+        line = self._line
+        if line is None:
+            return None, False
+
+        # Check "NOVEHICLE" or arrivalTime == 0
+        if not line.has_vehicle or line.arrival_time == 0:
             # We strictly prevent returning 0 if there is no vehicle
-            return None
-            
-        return round(arrival_time / 60)
+            return None, False
+
+        if not self._fetch_ok:
+            # KakaoMap has been failing for longer than stale data is replayed.
+            predicted = self._predicted_minutes()
+            return predicted, predicted is not None
+
+        if (minutes := self._countdown_minutes(line.arrival_time)) is None:
+            # The known buses are gone and the next poll is still a while off.
+            predicted = self._predicted_minutes()
+            return predicted, predicted is not None
+        return minutes, False
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the minutes until arrival."""
+        return self._arrival()[0]
 
     @property
     def available(self) -> bool:
         """Return if entity is available."""
         # The sensor is "available" in HA terms even if bus is not there, 
         # but the state will be "unavailable" (None) if native_value returns None.
-        # However, if API failed completely, super().available is False.
-        if not super().available:
-            return False
+        # However, if API failed completely for this stop, it is unavailable
+        # unless the arrival history can still predict the next bus.
+        if not self._fetch_ok:
+            return self._arrival()[0] is not None
             
         # If logic dictates that "No Bus" = Unavailable entity, we can return False here.
         # But usually "Unknown" state is better for "No Bus".
@@ -110,24 +314,50 @@ class KakaoBusSensor(CoordinatorEntity, SensorEntity):
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return attributes."""
         attrs = {}
-        if not self.coordinator.data:
-            return attrs
-
-        line_data = self.coordinator.data.get(self.bus_name, {})
-        if not line_data:
+        line = self._line
+        if line is None:
             return attrs
 
-        arrival = line_data.get("arrival", {})
-        
         # Next bus (2nd bus)
-        arrival_time_2 = arrival.get("arrivalTime2", 0)
-        if arrival_time_2 > 0:
-            attrs["next_bus_min"] = round(arrival_time_2 / 60)
+        if line.arrival_time_2 > 0:
+            attrs["next_bus_min"] = self._countdown_minutes(line.arrival_time_2)
         else:
             attrs["next_bus_min"] = None
 
-        attrs["direction"] = arrival.get("direction")
-        attrs["stop_name"] = self.coordinator.entry.title # Reuse title which handles Stop Name
-        attrs["vehicle_type"] = arrival.get("vehicleType")
+        attrs["stops_away"] = line.stop_count
+        attrs["next_bus_stops_away"] = line.stop_count_2
+        attrs["direction"] = line.direction
+        attrs["stop_name"] = self.tracker.title
+        attrs["vehicle_type"] = line.vehicle_type
+        attrs["stale"] = self.tracker.stale
+        # True while the state is estimated from past arrivals, not KakaoMap.
+        attrs["predicted"] = self._arrival()[1]
         
         return attrs
+
+
+class KakaoBusMetricSensor(ChangeOnlyEntity, SensorEntity):
+    """Diagnostic sensor exposing one performance metric of a stop."""
+
+    entity_description: KakaoBusMetricDescription
+
+    def __init__(self, tracker: StopTracker, description: KakaoBusMetricDescription) -> None:
+        """Initialize."""
+        super().__init__(tracker.coordinator)
+        self.tracker = tracker
+        self.entity_description = description
+        self._attr_has_entity_name = True
+        self._attr_entity_category = EntityCategory.DIAGNOSTIC
+        self._attr_entity_registry_enabled_default = False
+        self._attr_unique_id = f"kakaobus_{tracker.key}_{description.key}"
+        self._attr_device_info = stop_device_info(tracker)
+
+    @property
+    def available(self) -> bool:
+        """Metrics stay meaningful while fetching fails."""
+        return True
+
+    @property
+    def native_value(self) -> float | int | datetime | None:
+        """Return the current metric value."""
+        return self.entity_description.value_fn(self.tracker.metrics)
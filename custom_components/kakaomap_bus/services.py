@@ -0,0 +1,238 @@
+"""Services for HA KakaoMap Bus."""
+from __future__ import annotations
+
+import asyncio
+from functools import partial
+import logging
+from pathlib import Path
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .api import build_bus_dict, describe_api_error
+from .const import (
+    DEFAULT_PROFILE_UPDATES,
+    DOMAIN,
+    MAX_PROFILE_UPDATES,
+    MAX_SERVICE_STOPS,
+    SERVICE_BUDGET_SHARE,
+)
+from .coordinator import KakaoBusCoordinator, StopTracker
+from .models import BusArrival
+from .profiler import async_start_profiler
+from .scheduler import async_get_scheduler
+from .stop_index import async_get_stop_index, async_record_stop
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_GET_ARRIVALS = "get_arrivals"
+SERVICE_IMPORT_STOPS = "import_stops"
+SERVICE_PROFILE = "profile"
+ATTR_STOP_IDS = "stop_ids"
+ATTR_LINES = "lines"
+ATTR_PATH = "path"
+ATTR_UPDATES = "updates"
+ATTR_CPROFILE = "cprofile"
+
+GET_ARRIVALS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_STOP_IDS): vol.All(
+            cv.ensure_list, [cv.string], vol.Length(min=1, max=MAX_SERVICE_STOPS)
+        ),
+        vol.Optional(ATTR_LINES): vol.All(cv.ensure_list, [cv.string]),
+    }
+)
+IMPORT_STOPS_SCHEMA = vol.Schema({vol.Required(ATTR_PATH): cv.string})
+PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_UPDATES, default=DEFAULT_PROFILE_UPDATES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_PROFILE_UPDATES)
+        ),
+        vol.Optional(ATTR_CPROFILE, default=False): cv.boolean,
+    }
+)
+
+
+def _find_tracker(hass: HomeAssistant, stop_id: str) -> StopTracker | None:
+    """Return the tracker of this stop in a configured entry, if any."""
+    for value in hass.data.get(DOMAIN, {}).values():
+        if isinstance(value, KakaoBusCoordinator) and stop_id in value.stops:
+            return value.stops[stop_id]
+    return None
+
+
+def _lines_response(lines: dict[str, BusArrival]) -> dict[str, Any]:
+    """Return the arrivals of a stop keyed by line name."""
+    return {name: line.as_dict() for name, line in lines.items()}
+
+
+@callback
+def _cached_stop(
+    hass: HomeAssistant, stop_id: str, lines: set[str] | None
+) -> dict[str, Any] | None:
+    """Return the arrivals of one stop from fresh coordinator data, if any."""
+    tracker = _find_tracker(hass, stop_id)
+    if (
+        tracker is None
+        or tracker.data is None
+        or tracker.data.fetched_at is None
+        or not tracker.available
+        or tracker.stale
+        or tracker.seconds_since_fetch >= tracker.coordinator.poll_interval.total_seconds()
+        # A tracker only holds its tracked lines.
+        or (lines is None and not tracker.track_all)
+        or not (lines or set()) <= tracker.data.lines.keys()
+    ):
+        return None
+    return {
+        "name": tracker.stop_name,
+        "fetched_at": tracker.data.fetched_at.isoformat(),
+        "cached": True,
+        "lines": _lines_response(
+            {
+                name: line
+                for name, line in tracker.data.lines.items()
+                if lines is None or name in lines
+            }
+        ),
+    }
+
+
+async def _async_fetch_stop(
+    hass: HomeAssistant, stop_id: str, lines: set[str] | None
+) -> dict[str, Any]:
+    """Return the arrivals of one stop from KakaoMap."""
+    # Requests go through the shared scheduler, which caps parallel
+    # requests, enforces the request budget and joins in-flight fetches.
+    payload = await async_get_scheduler(hass).async_fetch(stop_id)
+    data = payload.decode()
+    async_record_stop(hass, stop_id, data.get("name"))
+    return {
+        "name": data.get("name", stop_id),
+        "fetched_at": payload.fetched_at.isoformat(),
+        "cached": False,
+        "lines": _lines_response(build_bus_dict(data, lines)),
+    }
+
+
+async def _async_get_arrivals(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the get_arrivals service call.
+
+    Stops needing a new request only use part of the request budget that
+    is free right now; the rest get a ``rate_limited`` error instead of
+    waiting for the budget, so one call neither blocks nor starves polls.
+    """
+    stop_ids: list[str] = list(dict.fromkeys(call.data[ATTR_STOP_IDS]))
+    lines: set[str] | None = (
+        set(call.data[ATTR_LINES]) if call.data.get(ATTR_LINES) else None
+    )
+
+    stops: dict[str, Any] = {}
+    to_fetch: list[str] = []
+    for stop_id in stop_ids:
+        if (cached := _cached_stop(hass, stop_id, lines)) is not None:
+            stops[stop_id] = cached
+        else:
+            to_fetch.append(stop_id)
+
+    scheduler = async_get_scheduler(hass)
+    allowed = int(scheduler.budget_left() * SERVICE_BUDGET_SHARE)
+    fetching: list[str] = []
+    for stop_id in to_fetch:
+        if not scheduler.needs_request(stop_id):
+            # Served from a fresh or in-flight response without a request.
+            fetching.append(stop_id)
+        elif allowed > 0:
+            allowed -= 1
+            fetching.append(stop_id)
+        else:
+            stops[stop_id] = {
+                "error": "Skipped to stay within the KakaoMap request budget; try again later",
+                "rate_limited": True,
+            }
+
+    results = await asyncio.gather(
+        *(_async_fetch_stop(hass, stop_id, lines) for stop_id in fetching),
+        return_exceptions=True,
+    )
+    for stop_id, result in zip(fetching, results):
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            _LOGGER.debug("get_arrivals failed for %s: %s", stop_id, result)
+            stops[stop_id] = {"error": describe_api_error(result)}
+        else:
+            stops[stop_id] = result
+
+    return {
+        "requested_at": dt_util.utcnow().isoformat(),
+        # Keep the requested order.
+        "stops": {stop_id: stops[stop_id] for stop_id in stop_ids},
+    }
+
+
+async def _async_import_stops(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the import_stops service call."""
+    path = Path(hass.config.path(call.data[ATTR_PATH])).resolve()
+    in_config_dir = path.is_relative_to(Path(hass.config.config_dir).resolve())
+    if not in_config_dir and not hass.config.is_allowed_path(str(path)):
+        raise ServiceValidationError(f"Access to {path} is not allowed")
+    if path.suffix.lower() not in (".csv", ".json"):
+        raise ServiceValidationError("Stop lists must be .csv or .json files")
+
+    index = await async_get_stop_index(hass)
+    try:
+        changed = await index.async_import(path)
+    except (OSError, ValueError) as err:
+        raise HomeAssistantError(f"Could not import {path}: {err}") from err
+    return {"imported": changed, "total": len(index)}
+
+
+async def _async_profile(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Handle the profile service call."""
+    profiler = async_start_profiler(
+        hass, call.data[ATTR_UPDATES], call.data[ATTR_CPROFILE]
+    )
+    _LOGGER.info(
+        "Profiling the next %s KakaoMap updates into %s",
+        profiler.remaining,
+        profiler.path,
+    )
+    return {"path": profiler.path, "updates": profiler.remaining}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ARRIVALS,
+        partial(_async_get_arrivals, hass),
+        schema=GET_ARRIVALS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STOPS,
+        partial(_async_import_stops, hass),
+        schema=IMPORT_STOPS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        partial(_async_profile, hass),
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
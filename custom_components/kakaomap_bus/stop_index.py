@@ -0,0 +1,356 @@
+"""Local searchable index of KakaoMap bus stops."""
+from __future__ import annotations
+
+import asyncio
+from array import array
+import csv
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    DATA_STOP_INDEX,
+    DOMAIN,
+    STOP_SEARCH_LIMIT,
+    STORAGE_VERSION,
+    STORE_SAVE_DELAY,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Header cells accepted for the stop ID column of an imported CSV.
+_ID_HEADERS = {"id", "stop_id", "busstopid"}
+
+
+class StopEntry(NamedTuple):
+    """One stop of the index."""
+
+    stop_id: str
+    name: str
+    city: str
+
+
+def _normalize(text: str) -> str:
+    """Return the search key of a name: no whitespace, case-folded."""
+    return "".join(text.split()).casefold()
+
+
+def _bigrams(key: str) -> set[str]:
+    """Return the character bigrams of a search key."""
+    return {key[pos : pos + 2] for pos in range(len(key) - 1)}
+
+
+def _decode_text(raw: bytes) -> str:
+    """Decode an imported file; public Korean stop lists are often CP949."""
+    try:
+        return raw.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return raw.decode("cp949")
+
+
+def parse_stop_list(raw: bytes, suffix: str) -> list[StopEntry]:
+    """Parse a CSV or JSON stop list of ID, name and optional city.
+
+    CSV rows are ``id,name[,city]`` with an optional header row. JSON is a
+    list of ``{"id", "name", "city"}`` objects or of ``[id, name, city]``
+    rows. Raises ValueError for anything else.
+    """
+    text = _decode_text(raw)
+    rows: list[Any]
+    if suffix.lower() == ".json":
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as err:
+            raise ValueError(f"Invalid JSON stop list: {err}") from err
+        if not isinstance(rows, list):
+            raise ValueError("JSON stop list must be a list")
+    else:
+        rows = list(csv.reader(io.StringIO(text)))
+        if rows and rows[0] and rows[0][0].strip().casefold() in _ID_HEADERS:
+            rows = rows[1:]
+
+    entries: list[StopEntry] = []
+    for row in rows:
+        if isinstance(row, dict):
+            values = [
+                row.get("id") or row.get("stop_id") or "",
+                row.get("name") or "",
+                row.get("city") or "",
+            ]
+        elif isinstance(row, list):
+            values = [*row[:3], "", "", ""][:3]
+        else:
+            raise ValueError(f"Unsupported stop list row: {row!r}")
+        stop_id, name, city = (str(value).strip() for value in values)
+        if stop_id and name:
+            entries.append(StopEntry(stop_id, name, city))
+    return entries
+
+
+class _Columns:
+    """One version of the index: stops column-wise plus bigram postings.
+
+    Bulk adds build a copy in the executor and swap it in on the event
+    loop, so readers always see a consistent version. A copy shares the
+    posting arrays of its source until it first appends to one.
+    """
+
+    __slots__ = ("ids", "names", "cities", "keys", "positions", "postings", "_borrowed")
+
+    def __init__(self) -> None:
+        """Initialize an empty index."""
+        self.ids: list[str] = []
+        self.names: list[str] = []
+        self.cities: list[str] = []
+        self.keys: list[str] = []
+        self.positions: dict[str, int] = {}
+        self.postings: dict[str, array] = {}
+        # Bigrams whose posting array still belongs to the source version.
+        self._borrowed: set[str] = set()
+
+    def copy(self) -> _Columns:
+        """Return a copy that can be changed without touching this one."""
+        columns = _Columns()
+        columns.ids = list(self.ids)
+        columns.names = list(self.names)
+        columns.cities = list(self.cities)
+        columns.keys = list(self.keys)
+        columns.positions = dict(self.positions)
+        columns.postings = dict(self.postings)
+        columns._borrowed = set(self.postings)
+        return columns
+
+    def release(self) -> None:
+        """Take ownership of all postings once the source is discarded."""
+        self._borrowed = set()
+
+    def add(self, entry: StopEntry) -> bool:
+        """Add or update one stop; return True if anything changed."""
+        key = _normalize(entry.name)
+        position = self.positions.get(entry.stop_id)
+        if position is None:
+            position = len(self.ids)
+            self.positions[entry.stop_id] = position
+            self.ids.append(entry.stop_id)
+            self.names.append(entry.name)
+            self.cities.append(entry.city)
+            self.keys.append(key)
+        elif self.names[position] == entry.name and (
+            not entry.city or self.cities[position] == entry.city
+        ):
+            return False
+        else:
+            self.names[position] = entry.name
+            self.cities[position] = entry.city or self.cities[position]
+            if self.keys[position] == key:
+                return True
+            self.keys[position] = key
+
+        for gram in _bigrams(key):
+            if (posting := self.postings.get(gram)) is None:
+                posting = self.postings[gram] = array("I")
+            elif gram in self._borrowed:
+                posting = self.postings[gram] = array("I", posting)
+                self._borrowed.discard(gram)
+            posting.append(position)
+        return True
+
+    def entry(self, position: int) -> StopEntry:
+        """Return the stop at a position."""
+        return StopEntry(self.ids[position], self.names[position], self.cities[position])
+
+
+def _build(columns: _Columns, entries: list[StopEntry]) -> tuple[_Columns, int]:
+    """Return a copy of ``columns`` with ``entries`` added, and how many changed."""
+    columns = columns.copy()
+    return columns, sum(columns.add(entry) for entry in entries)
+
+
+class StopIndex:
+    """Stop IDs, names and cities with a bigram index for name search.
+
+    Stops are stored column-wise and addressed by position; each bigram of
+    a normalized name maps to a compact array of positions. A search walks
+    the shortest posting list among the query's bigrams and confirms each
+    candidate with a substring test, which also drops postings left behind
+    by renamed stops.
+
+    Bulk work (loading, importing) runs one at a time in the executor on a
+    copy of the index; stops recorded meanwhile are queued and applied
+    after the copy replaced the live index.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize."""
+        self.hass = hass
+        self._store: Store[dict[str, list[str]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.stop_index"
+        )
+        self._columns = _Columns()
+        self._pending: dict[str, StopEntry] = {}
+        self._loaded = False
+        self._busy = True
+        self._load_lock = asyncio.Lock()
+        self._bulk_lock = asyncio.Lock()
+        self._load_task: asyncio.Task[None] | None = None
+
+    def __len__(self) -> int:
+        """Return the number of indexed stops."""
+        return len(self._columns.ids)
+
+    async def async_load(self) -> None:
+        """Load the stored index once and build the search structures.
+
+        A store that cannot be read leaves an empty index rather than one
+        that queues every added stop and fails every later load.
+        """
+        async with self._load_lock:
+            if self._loaded:
+                return
+            try:
+                try:
+                    stored = await self._store.async_load() or {}
+                except Exception as err:
+                    _LOGGER.warning("Could not load the stop index, starting empty: %s", err)
+                    stored = {}
+                entries = [
+                    StopEntry(*row)
+                    for row in zip(
+                        stored.get("ids", []), stored.get("names", []), stored.get("cities", [])
+                    )
+                ]
+                # Building postings for a nationwide list takes a while.
+                await self._async_bulk_add(entries, save=False)
+                self._loaded = True
+            finally:
+                self._busy = False
+                self._load_task = None
+            _LOGGER.debug("Loaded %s stops into the stop index", len(self))
+
+    async def _async_bulk_add(self, entries: list[StopEntry], save: bool = True) -> int:
+        """Add many stops in the executor; return how many were new or changed."""
+        async with self._bulk_lock:
+            self._busy = True
+            try:
+                columns, changed = await self.hass.async_add_executor_job(
+                    _build, self._columns, entries
+                )
+            finally:
+                self._busy = False
+            columns.release()
+            self._columns = columns
+        if changed and save:
+            self._store.async_delay_save(self._data_to_store, STORE_SAVE_DELAY)
+        if self._pending:
+            pending, self._pending = list(self._pending.values()), {}
+            self._async_add_entries(pending)
+        return changed
+
+    @callback
+    def _async_add_entries(self, entries: list[StopEntry]) -> int:
+        """Add stops and schedule a save when anything changed."""
+        changed = sum(self._columns.add(entry) for entry in entries)
+        if changed:
+            self._store.async_delay_save(self._data_to_store, STORE_SAVE_DELAY)
+        return changed
+
+    @callback
+    def async_add(self, stop_id: str, name: str | None, city: str = "") -> None:
+        """Remember a stop seen in a KakaoMap response."""
+        if not name:
+            return
+        entry = StopEntry(stop_id, name, city)
+        if self._busy:
+            self._pending[stop_id] = entry
+            if not self._loaded and self._load_task is None:
+                self._load_task = self.hass.async_create_background_task(
+                    self.async_load(), name=f"{DOMAIN} load stop index"
+                )
+            return
+        self._async_add_entries([entry])
+
+    async def async_import(self, path: Path) -> int:
+        """Import a CSV or JSON stop list; return how many stops were added or changed."""
+        await self.async_load()
+        raw = await self.hass.async_add_executor_job(path.read_bytes)
+        entries = await self.hass.async_add_executor_job(
+            parse_stop_list, raw, path.suffix
+        )
+        changed = await self._async_bulk_add(entries)
+        _LOGGER.info(
+            "Imported %s stops from %s (%s new or changed)", len(entries), path, changed
+        )
+        return changed
+
+    @callback
+    def _data_to_store(self) -> dict[str, list[str]]:
+        """Return a copy of the index column-wise; postings are rebuilt on load."""
+        columns = self._columns
+        return {
+            "ids": list(columns.ids),
+            "names": list(columns.names),
+            "cities": list(columns.cities),
+        }
+
+    def get(self, stop_id: str) -> StopEntry | None:
+        """Return the stop with this exact ID."""
+        columns = self._columns
+        if (position := columns.positions.get(stop_id)) is None:
+            return None
+        return columns.entry(position)
+
+    def search(self, query: str, limit: int = STOP_SEARCH_LIMIT) -> list[StopEntry]:
+        """Return stops whose name contains ``query``, best matches first.
+
+        Exact names rank before prefixes, prefixes before other substrings,
+        then shorter names first.
+        """
+        needle = _normalize(query)
+        if not needle:
+            return []
+
+        columns = self._columns
+        candidates: Any
+        if len(needle) == 1:
+            candidates = range(len(columns.keys))
+        else:
+            postings = [columns.postings.get(gram) for gram in _bigrams(needle)]
+            if not all(postings):
+                return []
+            candidates = set(min(postings, key=len))
+
+        ranked = sorted(
+            (
+                (0 if key == needle else 1 if key.startswith(needle) else 2, len(key), position)
+                for position in candidates
+                if needle in (key := columns.keys[position])
+            )
+        )
+        return [columns.entry(position) for *_, position in ranked[:limit]]
+
+
+async def async_get_stop_index(hass: HomeAssistant) -> StopIndex:
+    """Return the loaded domain-wide stop index."""
+    index = _get_index(hass)
+    await index.async_load()
+    return index
+
+
+@callback
+def async_record_stop(hass: HomeAssistant, stop_id: str, name: str | None) -> None:
+    """Add a stop seen in a KakaoMap response to the index."""
+    _get_index(hass).async_add(stop_id, name)
+
+
+@callback
+def _get_index(hass: HomeAssistant) -> StopIndex:
+    """Return the domain-wide stop index object, loaded or not."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (index := domain_data.get(DATA_STOP_INDEX)) is None:
+        index = domain_data[DATA_STOP_INDEX] = StopIndex(hass)
+    return index
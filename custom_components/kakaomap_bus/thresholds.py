@@ -0,0 +1,97 @@
+"""Arrival threshold crossings for HA KakaoMap Bus events."""
+from __future__ import annotations
+
+import re
+
+from .const import THRESHOLD_HYSTERESIS
+
+# Thresholds of lines without their own list.
+ALL_LINES = "*"
+
+
+def _parse_minutes(text: str) -> tuple[int, ...]:
+    """Parse '3, 5, 10' into sorted, de-duplicated minutes."""
+    minutes: set[int] = set()
+    for part in filter(None, re.split(r"[\s,]+", text)):
+        if not part.isdigit() or not 0 < int(part) <= 120:
+            raise ValueError(f"Invalid threshold '{part}', expected minutes from 1 to 120")
+        minutes.add(int(part))
+    return tuple(sorted(minutes))
+
+
+def parse_thresholds(text: str | None) -> dict[str, tuple[int, ...]]:
+    """Parse '3, 5, 10; 720: 2, 4' into minutes per line.
+
+    Rules without a line apply to every line (key ``ALL_LINES``); a line
+    with its own rule only uses that. Raise ValueError when malformed.
+    """
+    thresholds: dict[str, tuple[int, ...]] = {}
+    for rule in filter(None, (rule.strip() for rule in (text or "").split(";"))):
+        line, sep, minutes = rule.rpartition(":")
+        line = line.strip() if sep else ALL_LINES
+        if not line:
+            raise ValueError(f"Missing line in '{rule}'")
+        if line in thresholds:
+            raise ValueError(f"Thresholds for '{line}' given twice")
+        thresholds[line] = _parse_minutes(minutes)
+    return thresholds
+
+
+class LineEdges:
+    """Edge detection of one line's countdown against its thresholds.
+
+    A threshold fires once when the first bus gets within it and is armed
+    again only after the countdown moved more than ``THRESHOLD_HYSTERESIS``
+    minutes above it, so an ETA jittering around a threshold fires once.
+    Thresholds the first bus is already within when tracking starts do not
+    fire, so a restart does not repeat events.
+    """
+
+    __slots__ = ("minutes", "next_minutes", "_armed")
+
+    def __init__(self) -> None:
+        """Initialize without an observation."""
+        self.minutes: int | None = None
+        self.next_minutes: int | None = None
+        self._armed: set[int] | None = None
+
+    def update(
+        self, minutes: int | None, next_minutes: int | None, thresholds: tuple[int, ...]
+    ) -> tuple[bool, list[int]]:
+        """Observe the countdown; return (departed, thresholds crossed)."""
+        previous, previous_next = self.minutes, self.next_minutes
+        self.minutes, self.next_minutes = minutes, next_minutes
+
+        if self._armed is None:
+            self._armed = {
+                threshold
+                for threshold in thresholds
+                if minutes is None or minutes > threshold
+            }
+            return False, []
+
+        departed = (
+            previous is not None
+            and bool(thresholds)
+            and previous <= thresholds[-1]
+            and (
+                minutes is None
+                # The first bus now matches the one that used to be second.
+                or (
+                    previous_next is not None
+                    and abs(minutes - previous_next) < abs(minutes - previous)
+                )
+            )
+        )
+        if departed:
+            # A new first bus: every threshold applies to it again.
+            self._armed = set(thresholds)
+
+        crossed: list[int] = []
+        for threshold in thresholds:
+            if minutes is None or minutes > threshold + THRESHOLD_HYSTERESIS:
+                self._armed.add(threshold)
+            elif minutes <= threshold and threshold in self._armed:
+                self._armed.discard(threshold)
+                crossed.append(threshold)
+        return departed, crossed
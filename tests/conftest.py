@@ -0,0 +1,33 @@
+"""Shared fixtures for the HA KakaoMap Bus unit tests."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+import sys
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+
+
+@pytest.fixture
+def run_with_hass(tmp_path: Path) -> Callable[[Callable[[HomeAssistant], Awaitable[None]]], None]:
+    """Return a runner that awaits a test body with a bare Home Assistant core."""
+
+    def run(body: Callable[[HomeAssistant], Awaitable[None]]) -> None:
+        async def main() -> None:
+            hass = HomeAssistant(str(tmp_path))
+            try:
+                await body(hass)
+                await hass.async_block_till_done()
+            finally:
+                await hass.async_stop(force=True)
+
+        asyncio.run(main())
+
+    return run
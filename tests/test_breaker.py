@@ -0,0 +1,131 @@
+"""Tests for the host-wide circuit breaker."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.kakaomap_bus import breaker as breaker_module
+from custom_components.kakaomap_bus.breaker import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    """Monotonic clock moved by hand."""
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        """Return the current time."""
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    """Freeze the breaker's clock and take the jitter out of its delays."""
+    clock = Clock()
+    monkeypatch.setattr(breaker_module, "time", clock)
+    monkeypatch.setattr(breaker_module, "random", SimpleNamespace(uniform=lambda low, high: high))
+    return clock
+
+
+def _open(breaker: CircuitBreaker, failures: int = 3) -> None:
+    for _ in range(failures):
+        breaker.before_request()
+        breaker.record_failure(transient=True)
+
+
+def test_opens_after_threshold_of_transient_failures(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=3, base_delay=30, max_delay=900)
+
+    _open(breaker, 2)
+    assert breaker.state == "closed"
+    breaker.raise_if_open()
+
+    _open(breaker, 1)
+    assert breaker.state == "open"
+    assert breaker.retry_in == 30
+    with pytest.raises(CircuitOpenError) as err:
+        breaker.before_request()
+    assert err.value.retry_in == 30
+    assert not err.value.probing
+
+
+def test_non_transient_failure_closes(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=3)
+    _open(breaker, 2)
+
+    # The server answered, so it is reachable; the count starts over.
+    breaker.record_failure(transient=False)
+    _open(breaker, 2)
+    assert breaker.state == "closed"
+
+
+def test_retry_after_opens_for_exactly_that_long(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=5, max_delay=900)
+
+    breaker.record_failure(transient=True, retry_after=12)
+    assert breaker.state == "open"
+    assert breaker.retry_in == 12
+
+    breaker = CircuitBreaker(failure_threshold=5, max_delay=900)
+    breaker.record_failure(transient=True, retry_after=5000)
+    assert breaker.retry_in == 900
+
+
+def test_single_probe_when_half_open(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=30)
+    _open(breaker, 1)
+    clock.now += 30
+    assert breaker.state == "half_open"
+
+    assert breaker.before_request() is True
+    with pytest.raises(CircuitOpenError) as err:
+        breaker.before_request()
+    assert err.value.probing
+    assert "probe" in str(err.value)
+
+
+def test_probe_success_closes(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=30)
+    _open(breaker, 1)
+    clock.now += 30
+    breaker.before_request()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.before_request() is False
+
+    # Back to the base delay after a success.
+    _open(breaker, 1)
+    assert breaker.retry_in == 30
+
+
+def test_probe_failure_reopens_with_longer_delay(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=30, max_delay=100)
+    _open(breaker, 1)
+
+    for expected in (60, 100, 100):
+        clock.now += breaker.retry_in
+        assert breaker.before_request() is True
+        breaker.record_failure(transient=True)
+        assert breaker.state == "open"
+        assert breaker.retry_in == expected
+
+
+def test_released_probe_lets_the_next_request_probe(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=1, base_delay=30)
+    _open(breaker, 1)
+    clock.now += 30
+    assert breaker.before_request() is True
+
+    breaker.release_probe()
+    assert breaker.before_request() is True
+
+
+def test_closed_requests_do_not_claim_a_probe(clock: Clock) -> None:
+    breaker = CircuitBreaker(failure_threshold=2)
+
+    assert breaker.before_request() is False
+    assert breaker.before_request() is False
@@ -0,0 +1,132 @@
+"""Tests for the fixed-size arrival history."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from custom_components.kakaomap_bus.history import LineHistory, SlotRing, time_slot
+from custom_components.kakaomap_bus.models import BusArrival
+
+# Monday 08:10 in Home Assistant's default UTC time zone.
+NOW = datetime(2024, 1, 1, 8, 10, tzinfo=UTC)
+SLOT = 8
+
+
+def test_time_slot() -> None:
+    assert time_slot(NOW) == SLOT
+    assert time_slot(datetime(2024, 1, 7, 23, 59, tzinfo=UTC)) == 7 * 24 - 1
+
+
+def test_slot_ring_keeps_the_last_samples() -> None:
+    ring = SlotRing("H", slots=2, depth=3)
+    assert ring.samples(0) == 0
+    assert ring.median(0) is None
+
+    for value in (100, 200, 900):
+        ring.add(0, value)
+    assert ring.samples(0) == 3
+    assert ring.median(0) == 200
+
+    # The oldest sample (100) is overwritten.
+    ring.add(0, 1000)
+    assert ring.samples(0) == 3
+    assert ring.median(0) == 900
+    assert ring.samples(1) == 0
+
+
+def test_slot_ring_round_trip_and_shape_check() -> None:
+    ring = SlotRing("h", slots=2, depth=3)
+    ring.add(1, -250)
+    ring.add(1, 50)
+
+    restored = SlotRing("h", slots=2, depth=3)
+    restored.load(ring.as_dict())
+    assert restored.samples(1) == 2
+    assert restored.median(1) == -100
+
+    other = SlotRing("h", slots=2, depth=4)
+    other.load(ring.as_dict())
+    assert other.samples(1) == 0
+
+
+def test_observe_learns_headway() -> None:
+    history = LineHistory()
+
+    history.observe(BusArrival("720", 600, 900), NOW, None, None)
+    history.observe(BusArrival("720", 600, 0), NOW, None, None)
+    history.observe(BusArrival("720", 600, 900, realtime_state="NOVEHICLE"), NOW, None, None)
+
+    assert history.headway.samples(SLOT) == 1
+    assert history.headway.median(SLOT) == 300
+    assert history.summary() == {"headway_samples": 1, "drift_samples": 0}
+
+
+def test_observe_learns_drift() -> None:
+    history = LineHistory()
+    previous = BusArrival("720", 600, 1200)
+
+    # 60 s later the ETA only dropped by 45 s: a quarter slower than real time.
+    history.observe(BusArrival("720", 555, 1155), NOW + timedelta(seconds=60), previous, NOW)
+    assert history.drift.median(SLOT) == 250
+
+    # Drift is clamped.
+    history = LineHistory()
+    history.observe(BusArrival("720", 600, 1200), NOW + timedelta(seconds=60), previous, NOW)
+    assert history.drift.median(SLOT) == 500
+
+
+@pytest.mark.parametrize(
+    ("previous", "current", "elapsed"),
+    [
+        # The first bus has left; the ETA belongs to the second one.
+        (BusArrival("720", 200, 500), BusArrival("720", 395, 900), 100),
+        # The first bus should have arrived already.
+        (BusArrival("720", 60, 600), BusArrival("720", 480, 900), 120),
+        # Too long since the last poll.
+        (BusArrival("720", 3000, 0), BusArrival("720", 1000, 0), 1900),
+    ],
+)
+def test_observe_skips_unusable_drift(
+    previous: BusArrival, current: BusArrival, elapsed: int
+) -> None:
+    history = LineHistory()
+
+    history.observe(current, NOW + timedelta(seconds=elapsed), previous, NOW)
+    assert history.drift.samples(time_slot(NOW + timedelta(seconds=elapsed))) == 0
+
+
+def test_predict_counts_down_known_etas() -> None:
+    history = LineHistory()
+    line = BusArrival("720", 300, 900)
+
+    assert history.predict(line, 100, NOW) == 200
+    assert history.predict(line, 400, NOW) == 500
+    # Both buses have passed and no headway is known.
+    assert history.predict(line, 1000, NOW) is None
+    assert history.predict(BusArrival("720"), 10, NOW) is None
+
+
+def test_predict_uses_learned_drift_and_headway() -> None:
+    history = LineHistory()
+    history.drift.add(SLOT, 250)
+    history.headway.add(SLOT, 600)
+    line = BusArrival("720", 300, 900)
+
+    assert history.predict(line, 200, NOW) == 150
+    assert history.predict(line, 1000, NOW) == 150
+    # 1400 s at three quarters speed is 1050 s: 150 s past the second bus,
+    # so the next one follows 600 s after it.
+    assert history.predict(line, 1400, NOW) == 450
+    # Other hours have learned nothing.
+    assert history.predict(line, 200, NOW + timedelta(hours=1)) == 100
+
+
+def test_line_history_round_trip() -> None:
+    history = LineHistory()
+    history.headway.add(SLOT, 600)
+    history.drift.add(SLOT, -100)
+
+    restored = LineHistory.from_dict(history.as_dict())
+    assert restored.headway.median(SLOT) == 600
+    assert restored.drift.median(SLOT) == -100
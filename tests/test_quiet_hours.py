@@ -0,0 +1,113 @@
+"""Tests for the quiet-hours schedule."""
+from __future__ import annotations
+
+from datetime import UTC, datetime
+
+import pytest
+
+from custom_components.kakaomap_bus.quiet_hours import QuietSchedule
+
+# 2024-01-01 is a Monday; Home Assistant's default time zone is UTC.
+MONDAY = 1
+SUNDAY = 7
+
+
+def at(day: int, hour: int, minute: int = 0) -> datetime:
+    """Return a local time in the first week of January 2024."""
+    return datetime(2024, 1, day, hour, minute, tzinfo=UTC)
+
+
+def test_legacy_daily_window() -> None:
+    quiet = QuietSchedule.from_options("00:00:00", "05:00:00", None)
+
+    assert quiet
+    assert quiet.is_quiet(at(MONDAY, 0))
+    assert quiet.is_quiet(at(MONDAY, 4, 59))
+    # Windows are half-open, so the end time is no longer quiet.
+    assert not quiet.is_quiet(at(MONDAY, 5))
+    assert quiet.is_quiet(at(SUNDAY, 3))
+
+
+def test_equal_start_and_end_is_never_quiet() -> None:
+    # The pre-schedule coordinator treated start == end as quiet all day;
+    # an empty window now turns quiet hours off instead.
+    quiet = QuietSchedule.from_options("05:00", "05:00", None)
+
+    assert not quiet
+    assert not quiet.is_quiet(at(MONDAY, 5))
+    assert not quiet.is_quiet(at(MONDAY, 12))
+    assert quiet.next_change(at(MONDAY, 12)) is None
+
+
+def test_blank_schedule_falls_back_to_daily_window() -> None:
+    quiet = QuietSchedule.from_options("01:00", "02:00", "  ")
+
+    assert quiet.is_quiet(at(MONDAY, 1, 30))
+    assert not quiet.is_quiet(at(MONDAY, 2, 30))
+
+
+def test_window_across_midnight_belongs_to_the_next_day() -> None:
+    quiet = QuietSchedule.parse("fri 23:00-06:00")
+
+    assert quiet.is_quiet(at(5, 23, 30))  # Friday
+    assert quiet.is_quiet(at(6, 5, 59))  # Saturday morning
+    assert not quiet.is_quiet(at(6, 23, 30))
+    assert not quiet.is_quiet(at(4, 5))  # Thursday
+
+
+def test_weekday_rules_and_wrapping_ranges() -> None:
+    quiet = QuietSchedule.parse("mon-fri 00:00-05:00; sat-mon 07:00-08:00, 23:30-24:00")
+
+    assert quiet.is_quiet(at(MONDAY, 7, 30))
+    assert quiet.is_quiet(at(6, 7, 30))  # Saturday
+    assert quiet.is_quiet(at(SUNDAY, 23, 45))
+    assert not quiet.is_quiet(at(2, 7, 30))  # Tuesday
+    assert not quiet.is_quiet(at(6, 3))  # Saturday
+    assert quiet.is_quiet(at(3, 3))  # Wednesday
+
+
+def test_overlapping_windows_merge() -> None:
+    quiet = QuietSchedule.parse("daily 01:00-03:00, 02:00-04:00")
+
+    assert quiet.is_quiet(at(MONDAY, 3, 30))
+    assert quiet.next_change(at(MONDAY, 1, 30)) == at(MONDAY, 4)
+
+
+@pytest.mark.parametrize(
+    "schedule",
+    [
+        "mon",
+        "funday 00:00-05:00",
+        "mon 00:00",
+        "mon 25:00-26:00",
+        "mon 00:60-01:00",
+        "mon 24:01-01:00",
+        "mon 1am-2am",
+    ],
+)
+def test_invalid_schedules_raise(schedule: str) -> None:
+    with pytest.raises(ValueError):
+        QuietSchedule.parse(schedule)
+
+
+def test_next_change() -> None:
+    quiet = QuietSchedule.parse("mon-fri 00:00-05:00")
+
+    assert quiet.next_change(at(MONDAY, 3)) == at(MONDAY, 5)
+    assert quiet.next_change(at(MONDAY, 5)) == at(2, 0)
+    # Friday 05:00 to Monday 00:00 is one stretch of polling.
+    assert quiet.next_change(at(5, 12)) == at(8, 0)
+
+
+def test_next_change_skips_windows_that_continue_past_midnight() -> None:
+    quiet = QuietSchedule.parse("daily 22:00-06:00")
+
+    assert quiet.next_change(at(MONDAY, 23)) == at(2, 6)
+    assert quiet.next_change(at(MONDAY, 12)) == at(MONDAY, 22)
+
+
+def test_always_quiet_never_changes() -> None:
+    quiet = QuietSchedule.parse("daily 00:00-24:00")
+
+    assert quiet.is_quiet(at(MONDAY, 12))
+    assert quiet.next_change(at(MONDAY, 12)) is None
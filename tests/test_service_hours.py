@@ -0,0 +1,97 @@
+"""Tests for learned per-stop service hours."""
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from custom_components.kakaomap_bus.history import SLOTS, ServiceHours
+
+WEEK = timedelta(days=7)
+# Monday 03:00 in Home Assistant's default UTC time zone.
+NIGHT = datetime(2024, 1, 1, 3, 0, tzinfo=UTC)
+NIGHT_SLOT = 3
+
+
+def _learn_idle(hours: ServiceHours, start: datetime, weeks: int = 2) -> None:
+    for week in range(weeks):
+        hours.observe(start + week * WEEK, idle=True)
+
+
+def test_two_idle_weeks_make_an_hour_idle() -> None:
+    hours = ServiceHours()
+
+    _learn_idle(hours, NIGHT, weeks=1)
+    assert not hours.is_idle(NIGHT_SLOT)
+    _learn_idle(hours, NIGHT + 2 * WEEK, weeks=1)
+    assert hours.is_idle(NIGHT_SLOT)
+    assert hours.idle_hours()["mon"] == [3]
+    assert hours.idle_hours()["tue"] == []
+
+
+def test_each_calendar_hour_counts_once() -> None:
+    hours = ServiceHours()
+
+    for minute in range(0, 60, 5):
+        hours.observe(NIGHT + timedelta(minutes=minute), idle=True)
+    assert not hours.is_idle(NIGHT_SLOT)
+
+
+def test_a_vehicle_ends_an_idle_period_at_once() -> None:
+    hours = ServiceHours()
+    _learn_idle(hours, NIGHT, weeks=6)
+
+    hours.observe(NIGHT + 6 * WEEK, idle=False)
+    assert not hours.is_idle(NIGHT_SLOT)
+    # An idle poll later in the same hour does not undo the sighting.
+    hours.observe(NIGHT + 6 * WEEK + timedelta(minutes=30), idle=True)
+    _learn_idle(hours, NIGHT + 7 * WEEK, weeks=1)
+    assert not hours.is_idle(NIGHT_SLOT)
+
+
+def test_active_hours_need_more_idle_weeks() -> None:
+    hours = ServiceHours()
+    for week in range(3):
+        hours.observe(NIGHT + week * WEEK, idle=False)
+
+    _learn_idle(hours, NIGHT + 3 * WEEK, weeks=7)
+    assert not hours.is_idle(NIGHT_SLOT)
+    _learn_idle(hours, NIGHT + 10 * WEEK, weeks=1)
+    assert hours.is_idle(NIGHT_SLOT)
+
+
+def test_idle_probe_delay() -> None:
+    hours = ServiceHours()
+    _learn_idle(hours, NIGHT)
+    at_ten_to_four = NIGHT + timedelta(minutes=50)
+
+    # Lines run again at 04:00, so probe then rather than in 30 minutes.
+    assert hours.idle_probe_delay(at_ten_to_four) == 600
+    assert hours.idle_probe_delay(NIGHT + timedelta(minutes=10)) == 1800
+
+    _learn_idle(hours, NIGHT + timedelta(hours=1))
+    assert hours.idle_probe_delay(at_ten_to_four) == 1800
+
+    # Lines should run at 05:00.
+    assert hours.idle_probe_delay(NIGHT + timedelta(hours=2)) is None
+
+
+def test_idle_probe_delay_wraps_around_the_week() -> None:
+    hours = ServiceHours()
+    sunday_night = datetime(2024, 1, 7, 23, 50, tzinfo=UTC)
+    _learn_idle(hours, sunday_night)
+
+    assert hours.idle_probe_delay(sunday_night) == 600
+    _learn_idle(hours, sunday_night + timedelta(minutes=20))
+    assert hours.is_idle(0)
+    assert hours.idle_probe_delay(sunday_night) == 1800
+
+
+def test_round_trip_and_shape_check() -> None:
+    hours = ServiceHours()
+    _learn_idle(hours, NIGHT)
+
+    restored = ServiceHours.from_dict(hours.as_dict())
+    assert restored.is_idle(NIGHT_SLOT)
+
+    data = hours.as_dict()
+    data["score"] = ServiceHours().as_dict()["score"][:8]
+    assert not any(ServiceHours.from_dict(data).is_idle(slot) for slot in range(SLOTS))
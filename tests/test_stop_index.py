@@ -0,0 +1,199 @@
+"""Tests for the local stop index."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.kakaomap_bus.stop_index import (
+    StopEntry,
+    StopIndex,
+    _Columns,
+    parse_stop_list,
+)
+
+STOPS = [
+    StopEntry("BS1", "수원역", "수원"),
+    StopEntry("BS2", "수원역 환승센터", "수원"),
+    StopEntry("BS3", "북수원역", "수원"),
+    StopEntry("BS4", "Gangnam Station", "서울"),
+    StopEntry("BS5", "수원시청", "수원"),
+]
+
+
+def _columns(entries: list[StopEntry] = STOPS) -> _Columns:
+    columns = _Columns()
+    for entry in entries:
+        columns.add(entry)
+    return columns
+
+
+def _ids(entries: list[StopEntry]) -> list[str]:
+    return [entry.stop_id for entry in entries]
+
+
+def test_parse_csv_with_header() -> None:
+    raw = "stop_id,name,city\nBS1, 수원역 ,수원\nBS2,강남역\n,no id\nBS3,\n".encode()
+
+    assert parse_stop_list(raw, ".csv") == [
+        StopEntry("BS1", "수원역", "수원"),
+        StopEntry("BS2", "강남역", ""),
+    ]
+
+
+def test_parse_cp949_csv_without_header() -> None:
+    raw = "BS1,수원역,수원\n".encode("cp949")
+
+    assert parse_stop_list(raw, ".CSV") == [StopEntry("BS1", "수원역", "수원")]
+
+
+def test_parse_json_objects_and_rows() -> None:
+    raw = json.dumps(
+        [
+            {"id": "BS1", "name": "수원역", "city": "수원"},
+            {"stop_id": 42, "name": "강남역"},
+            ["BS3", "북수원역"],
+        ]
+    ).encode()
+
+    assert parse_stop_list(raw, ".json") == [
+        StopEntry("BS1", "수원역", "수원"),
+        StopEntry("42", "강남역", ""),
+        StopEntry("BS3", "북수원역", ""),
+    ]
+
+
+@pytest.mark.parametrize("raw", [b"{not json", b'{"id": "BS1"}', b'["BS1"]'])
+def test_parse_json_rejects_other_shapes(raw: bytes) -> None:
+    with pytest.raises(ValueError):
+        parse_stop_list(raw, ".json")
+
+
+def test_search_ranks_exact_then_prefix_then_shorter() -> None:
+    columns = _columns()
+    index = StopIndex.__new__(StopIndex)
+    index._columns = columns
+
+    assert _ids(index.search("수원역")) == ["BS1", "BS2", "BS3"]
+    # Equally long names keep the order they were added in.
+    assert _ids(index.search("수원")) == ["BS1", "BS5", "BS2", "BS3"]
+    assert _ids(index.search("수원", limit=2)) == ["BS1", "BS5"]
+    assert _ids(index.search("역")) == ["BS1", "BS3", "BS2"]
+
+
+def test_search_ignores_case_and_whitespace() -> None:
+    index = StopIndex.__new__(StopIndex)
+    index._columns = _columns()
+
+    assert _ids(index.search("gangnam station")) == ["BS4"]
+    assert _ids(index.search("수원 역환승")) == ["BS2"]
+    assert index.search("  ") == []
+    assert index.search("부산") == []
+
+
+def test_renamed_stop_is_found_by_its_new_name_only() -> None:
+    columns = _columns()
+    assert columns.add(StopEntry("BS3", "화서역", ""))
+    index = StopIndex.__new__(StopIndex)
+    index._columns = columns
+
+    assert _ids(index.search("북수원")) == []
+    assert _ids(index.search("화서")) == ["BS3"]
+    # An empty city keeps the one already known.
+    assert index.get("BS3") == StopEntry("BS3", "화서역", "수원")
+
+
+def test_add_reports_changes() -> None:
+    columns = _columns()
+
+    assert not columns.add(StopEntry("BS1", "수원역", ""))
+    assert not columns.add(StopEntry("BS1", "수원역", "수원"))
+    assert columns.add(StopEntry("BS1", "수원역", "경기"))
+    assert columns.add(StopEntry("BS1", "수원 역", "경기"))
+
+
+def test_copy_leaves_the_source_untouched() -> None:
+    source = _columns()
+    postings = {gram: list(posting) for gram, posting in source.postings.items()}
+
+    copy = source.copy()
+    copy.add(StopEntry("BS6", "수원역 서편", "수원"))
+    copy.add(StopEntry("BS1", "수원역 동편", "수원"))
+
+    assert len(source.ids) == 5
+    assert source.names[0] == "수원역"
+    assert {gram: list(posting) for gram, posting in source.postings.items()} == postings
+    assert 5 in copy.postings["수원"]
+    # Untouched postings are still shared.
+    assert copy.postings["gn"] is source.postings["gn"]
+
+
+def test_bulk_add_swaps_in_a_new_version(run_with_hass) -> None:
+    async def body(hass: HomeAssistant) -> None:
+        index = StopIndex(hass)
+        await index.async_load()
+        before = index._columns
+
+        assert await index._async_bulk_add(STOPS) == 5
+        assert index._columns is not before
+        assert len(before.ids) == 0
+        assert _ids(index.search("수원역")) == ["BS1", "BS2", "BS3"]
+
+    run_with_hass(body)
+
+
+def test_stops_added_during_a_bulk_add_are_kept(run_with_hass) -> None:
+    async def body(hass: HomeAssistant) -> None:
+        index = StopIndex(hass)
+        await index.async_load()
+
+        bulk = asyncio.create_task(index._async_bulk_add(STOPS[:3]))
+        await asyncio.sleep(0)
+        index.async_add("BS1", "수원역 (공사중)")
+        index.async_add("BS9", "광교중앙역")
+        assert index.get("BS9") is None
+        await bulk
+
+        assert index.get("BS1") == StopEntry("BS1", "수원역 (공사중)", "수원")
+        assert _ids(index.search("광교")) == ["BS9"]
+
+    run_with_hass(body)
+
+
+def test_add_before_load_loads_stored_stops(run_with_hass) -> None:
+    async def body(hass: HomeAssistant) -> None:
+        first = StopIndex(hass)
+        await first.async_load()
+        await first._async_bulk_add(STOPS)
+        await first._store.async_save(first._data_to_store())
+
+        index = StopIndex(hass)
+        index.async_add("BS9", "광교중앙역")
+        await index.async_load()
+
+        assert len(index) == 6
+        assert index.get("BS9") == StopEntry("BS9", "광교중앙역", "")
+
+    run_with_hass(body)
+
+
+def test_unreadable_store_starts_empty(run_with_hass, monkeypatch) -> None:
+    async def body(hass: HomeAssistant) -> None:
+        index = StopIndex(hass)
+
+        async def broken_load() -> None:
+            raise ValueError("corrupt")
+
+        monkeypatch.setattr(index._store, "async_load", broken_load)
+        index.async_add("BS9", "광교중앙역")
+        await index.async_load()
+
+        assert index._loaded
+        assert len(index) == 1
+        index.async_add("BS1", "수원역")
+        assert len(index) == 2
+
+    run_with_hass(body)
@@ -0,0 +1,112 @@
+"""Tests for arrival threshold parsing and edge detection."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.kakaomap_bus.thresholds import ALL_LINES, LineEdges, parse_thresholds
+
+THRESHOLDS = (3, 5)
+
+
+def test_parse_thresholds() -> None:
+    assert parse_thresholds(None) == {}
+    assert parse_thresholds(" ; ") == {}
+    assert parse_thresholds("10, 3 5,5; 720: 2 4; 수원 7-2: 1") == {
+        ALL_LINES: (3, 5, 10),
+        "720": (2, 4),
+        "수원 7-2": (1,),
+    }
+
+
+@pytest.mark.parametrize(
+    "text",
+    ["0", "121", "3, x", "-1", ": 3", "720: 3; 720: 4", "3; 5"],
+)
+def test_parse_thresholds_rejects_malformed_rules(text: str) -> None:
+    with pytest.raises(ValueError):
+        parse_thresholds(text)
+
+
+def _edges(minutes: int | None, next_minutes: int | None = None) -> LineEdges:
+    edges = LineEdges()
+    assert edges.update(minutes, next_minutes, THRESHOLDS) == (False, [])
+    return edges
+
+
+def test_first_observation_never_fires() -> None:
+    edges = _edges(4)
+
+    # 5 was already passed when tracking started; 3 is still armed.
+    assert edges.update(5, None, THRESHOLDS) == (False, [])
+    assert edges.update(3, None, THRESHOLDS) == (False, [3])
+
+
+def test_crossing_fires_once_per_threshold() -> None:
+    edges = _edges(10)
+
+    assert edges.update(5, None, THRESHOLDS) == (False, [5])
+    assert edges.update(4, None, THRESHOLDS) == (False, [])
+    assert edges.update(1, None, THRESHOLDS) == (False, [3])
+
+
+def test_large_jump_crosses_several_thresholds() -> None:
+    edges = _edges(10)
+
+    assert edges.update(2, None, THRESHOLDS) == (False, [3, 5])
+
+
+def test_hysteresis_ignores_jitter_around_a_threshold() -> None:
+    edges = _edges(10)
+    assert edges.update(5, None, THRESHOLDS) == (False, [5])
+
+    # Moving back up by the hysteresis margin keeps the threshold disarmed.
+    assert edges.update(6, None, THRESHOLDS) == (False, [])
+    assert edges.update(5, None, THRESHOLDS) == (False, [])
+
+    # Moving further up re-arms it.
+    assert edges.update(7, None, THRESHOLDS) == (False, [])
+    assert edges.update(5, None, THRESHOLDS) == (False, [5])
+
+
+def test_departure_when_second_bus_becomes_first() -> None:
+    edges = _edges(10, 12)
+    edges.update(2, 12, THRESHOLDS)
+
+    assert edges.update(11, 20, THRESHOLDS) == (True, [])
+    assert edges.update(5, 14, THRESHOLDS) == (False, [5])
+
+
+def test_departure_rearms_thresholds_for_a_close_next_bus() -> None:
+    edges = _edges(10, 12)
+    edges.update(1, 4, THRESHOLDS)
+
+    assert edges.update(4, 15, THRESHOLDS) == (True, [5])
+
+
+def test_departure_when_the_line_disappears() -> None:
+    edges = _edges(10)
+    edges.update(2, None, THRESHOLDS)
+
+    assert edges.update(None, None, THRESHOLDS) == (True, [])
+    assert edges.update(4, None, THRESHOLDS) == (False, [5])
+
+
+def test_no_departure_outside_the_thresholds() -> None:
+    edges = _edges(8, 15)
+
+    # The countdown jumped, but the first bus was never within a threshold.
+    assert edges.update(14, 25, THRESHOLDS) == (False, [])
+    assert edges.update(None, None, THRESHOLDS) == (False, [])
+
+
+def test_no_departure_when_the_same_bus_counts_down() -> None:
+    edges = _edges(10, 12)
+    edges.update(3, 12, THRESHOLDS)
+
+    assert edges.update(2, 11, THRESHOLDS) == (False, [])
+
+
+def test_without_thresholds_nothing_fires() -> None:
+    edges = LineEdges()
+    for minutes in (10, 2, None, 8):
+        assert edges.update(minutes, None, ()) == (False, [])